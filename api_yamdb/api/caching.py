@@ -0,0 +1,194 @@
+import hashlib
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import EmptyResultSet
+from django.db import connections
+
+from reviews.models import Category, Genre
+
+VERSION_KEY = 'version:{label}'
+COUNT_KEY = 'count:{label}:{version}:{query}'
+RESPONSE_KEY = 'response:{label}:{version}:{url}'
+TITLE_RESPONSE_KEY = 'response:title:{title_id}:{version}:{url}'
+LOCK_KEY = 'lock:{key}'
+TITLE_FRAGMENT_KEY = (
+    'fragment:title:{title_id}:{version}:{modified}:{genre}:{category}'
+)
+
+
+def model_version(model):
+    '''
+    Текущая версия данных модели для ключей кэша.
+    Если счетчик пропал из кэша, начинается новое пространство ключей.
+    None, если кэш недоступен: построенные на версии ключи не
+    создаются, и данные берутся из базы
+    '''
+    key = VERSION_KEY.format(label=model._meta.label_lower)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def bump_model_version(model):
+    '''
+    Делает устаревшими все ключи кэша, построенные на версии модели
+    '''
+    key = VERSION_KEY.format(label=model._meta.label_lower)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, time.time_ns(), timeout=None)
+
+
+def get_or_compute(key, compute, timeout):
+    '''
+    Значение из кэша с защитой от одновременного пересчета.
+    Пересчитывает только вызов, захвативший блокировку через cache.add;
+    остальные получают устаревшее значение, а если его нет - ждут
+    результат до CACHE_LOCK_WAIT секунд и после этого считают сами.
+    Блокировка хранится в общем кэше, поэтому действует и между
+    процессами, и снимается только владельцем.
+    Без ключа (кэш недоступен) значение просто вычисляется
+    '''
+    if key is None:
+        return compute()
+    cached = cache.get(key)
+    if cached is not None:
+        value, fresh_until = cached
+        if time.time() < fresh_until:
+            return value
+    lock = LOCK_KEY.format(key=key)
+    token = uuid.uuid4().hex
+    acquired = cache.add(lock, token, settings.CACHE_LOCK_TIMEOUT)
+    if not acquired:
+        if cached is not None:
+            return cached[0]
+        # Блокировки не видно: ее уже сняли или кэш недоступен,
+        # ждать результата бессмысленно.
+        if cache.get(lock) is None:
+            return compute()
+        deadline = time.time() + settings.CACHE_LOCK_WAIT
+        while time.time() < deadline:
+            time.sleep(settings.CACHE_LOCK_POLL_INTERVAL)
+            cached = cache.get(key)
+            if cached is not None:
+                return cached[0]
+    try:
+        value = compute()
+        cache.set(
+            key, (value, time.time() + timeout),
+            timeout + settings.CACHE_STALE_TIMEOUT
+        )
+    finally:
+        # Не дождавшийся вызов считает сам, но чужую блокировку не снимает;
+        # своя могла истечь и достаться другому вызову.
+        if acquired and cache.get(lock) == token:
+            cache.delete(lock)
+    return value
+
+
+def url_signature(request):
+    return hashlib.md5(request.build_absolute_uri().encode()).hexdigest()
+
+
+def response_key(model, request):
+    '''
+    Ключ закэшированного ответа на GET-запрос к выборке модели
+    '''
+    version = model_version(model)
+    if version is None:
+        return None
+    return RESPONSE_KEY.format(
+        label=model._meta.label_lower,
+        version=version,
+        url=url_signature(request),
+    )
+
+
+def title_response_key(title_id, version, request):
+    '''
+    Ключ закэшированного ответа на GET-запрос к ресурсу внутри
+    произведения: отзывам или комментариям
+    '''
+    return TITLE_RESPONSE_KEY.format(
+        title_id=title_id, version=version, url=url_signature(request)
+    )
+
+
+def title_fragment_key(title_id, version, modified):
+    '''
+    Ключ сериализованного представления произведения.
+    Версия произведения растет при изменении оценок и жанров,
+    дата изменения (timestamp) - при записи самого произведения,
+    а версии жанров и категорий - при их переименовании
+    '''
+    genre, category = model_version(Genre), model_version(Category)
+    if genre is None or category is None:
+        return None
+    return TITLE_FRAGMENT_KEY.format(
+        title_id=title_id,
+        version=version,
+        modified=modified,
+        genre=genre,
+        category=category,
+    )
+
+
+def query_signature(queryset):
+    try:
+        sql, params = queryset.query.sql_with_params()
+    except EmptyResultSet:
+        return 'empty'
+    return hashlib.md5(repr((sql, params)).encode()).hexdigest()
+
+
+def estimate_count(queryset):
+    '''
+    Быстрая оценка числа строк для выборки без условий:
+    статистика PostgreSQL или наибольший rowid в SQLite
+    '''
+    if queryset.query.where:
+        return None
+    model = queryset.model
+    connection = connections[queryset.db]
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute(
+                'SELECT reltuples::bigint FROM pg_class WHERE relname = %s',
+                (model._meta.db_table,)
+            )
+        elif connection.vendor == 'sqlite':
+            cursor.execute(
+                f'SELECT MAX(rowid) FROM {model._meta.db_table}'
+            )
+        else:
+            return None
+        row = cursor.fetchone()
+    return row[0] if row and row[0] is not None else None
+
+
+def cached_count(queryset):
+    '''
+    COUNT(*) выборки с кэшированием по версии модели и тексту запроса.
+    Для больших таблиц без условий может вернуть оценку
+    '''
+    version = model_version(queryset.model)
+    key = None if version is None else COUNT_KEY.format(
+        label=queryset.model._meta.label_lower,
+        version=version,
+        query=query_signature(queryset),
+    )
+
+    def count():
+        threshold = settings.PAGINATION_COUNT_ESTIMATE_THRESHOLD
+        estimate = estimate_count(queryset) if threshold is not None else None
+        if estimate is None or estimate < threshold:
+            return queryset.count()
+        return estimate
+
+    return get_or_compute(key, count, settings.PAGINATION_COUNT_CACHE_TIMEOUT)
@@ -0,0 +1,139 @@
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain
+
+from django.core.management.base import BaseCommand
+from django.test import Client
+from django.urls import reverse
+
+from reviews.models import Category, Genre, Title
+
+TITLE_ORDERINGS = ('-rating', '-weighted_rating', '-year')
+PAGED_LISTS = ('api:titles-list', 'api:genres-list', 'api:categories-list')
+
+
+def warm_urls(pages, titles):
+    '''
+    Самые запрашиваемые страницы API с числом страниц для каждой:
+    первые страницы списков, выборки произведений по жанрам
+    и категориям, популярные сортировки, топы и карточки самых
+    обсуждаемых произведений
+    '''
+    titles_url = reverse('api:titles-list')
+    urls = [(reverse(name), pages) for name in PAGED_LISTS]
+    urls.extend(
+        (f'{titles_url}?ordering={ordering}', 1)
+        for ordering in TITLE_ORDERINGS
+    )
+    for slug in Genre.objects.values_list('slug', flat=True):
+        urls.append((f'{titles_url}?genre={slug}', 1))
+        urls.append((reverse('api:genres-top', args=(slug,)), 1))
+    for slug in Category.objects.values_list('slug', flat=True):
+        urls.append((f'{titles_url}?category={slug}', 1))
+        urls.append((reverse('api:categories-top', args=(slug,)), 1))
+    for title_id in Title.objects.order_by(
+        '-rating_count', 'pk'
+    ).values_list('pk', flat=True)[:titles]:
+        urls.append((reverse('api:titles-detail', args=(title_id,)), 1))
+        urls.append((
+            reverse('api:reviews-list', kwargs={'title_id': title_id}), 1
+        ))
+    return urls
+
+
+def fetch(client, url, pages, secure):
+    '''
+    Запрашивает до pages страниц списка; следующая страница
+    запрашивается, только если в ответе есть ссылка next
+    '''
+    results = []
+    for page in range(1, pages + 1):
+        page_url = url if page == 1 else f'{url}?page={page}'
+        started = time.perf_counter()
+        response = client.get(page_url, secure=secure)
+        results.append(
+            (page_url, response.status_code, time.perf_counter() - started)
+        )
+        if page == pages or response.status_code != 200:
+            break
+        data = response.json()
+        if not isinstance(data, dict) or not data.get('next'):
+            break
+    return results
+
+
+class Command(BaseCommand):
+    '''
+    Прогрев кэшей API
+    '''
+    help = (
+        'Запрашивает самые популярные списки, выборки и карточки '
+        'произведений, чтобы заполнить кэши API после деплоя или '
+        'очистки кэша.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=4,
+            help='Сколько запросов выполнять одновременно',
+        )
+        parser.add_argument(
+            '--pages',
+            type=int,
+            default=3,
+            help='Сколько первых страниц каждого списка прогревать',
+        )
+        parser.add_argument(
+            '--titles',
+            type=int,
+            default=50,
+            help='Для скольких произведений прогревать карточку и отзывы',
+        )
+        parser.add_argument(
+            '--host',
+            default=None,
+            help=(
+                'Заголовок Host запросов: ссылки в ответах и ключи кэша '
+                'строятся по полному адресу, поэтому он должен совпадать '
+                'с адресом, по которому API запрашивают клиенты'
+            ),
+        )
+        parser.add_argument(
+            '--secure',
+            action='store_true',
+            help='Запрашивать страницы по https',
+        )
+
+    def handle(self, *args, **options):
+        urls = warm_urls(options['pages'], options['titles'])
+        headers = {'HTTP_HOST': options['host']} if options['host'] else {}
+
+        def warm(item):
+            url, pages = item
+            return fetch(Client(**headers), url, pages, options['secure'])
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max(options['concurrency'], 1)) as executor:
+            results = list(chain.from_iterable(executor.map(warm, urls)))
+        elapsed = time.perf_counter() - started
+        failed = 0
+        for url, status, duration in results:
+            if status != 200:
+                failed += 1
+                self.stderr.write(f'{status} {url}')
+            elif options['verbosity'] > 1:
+                self.stdout.write(f'{duration * 1000:8.1f} мс  {url}')
+        durations = sorted(duration for _, _, duration in results)
+        if not durations:
+            return
+        p95 = durations[min(len(durations) - 1, int(len(durations) * 0.95))]
+        self.stdout.write(self.style.SUCCESS(
+            f'Прогрето страниц: {len(results) - failed} из {len(results)} '
+            f'за {elapsed:.2f} с; медиана '
+            f'{statistics.median(durations) * 1000:.1f} мс, '
+            f'p95 {p95 * 1000:.1f} мс, '
+            f'максимум {durations[-1] * 1000:.1f} мс'
+        ))
@@ -0,0 +1,130 @@
+import hashlib
+import logging
+import os
+import threading
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import HttpResponse
+
+COALESCED_HEADER = 'X-Coalesced'
+
+logger = logging.getLogger(__name__)
+
+
+class CoalescingStats:
+    '''
+    Счетчики объединения запросов одного процесса. Каждые
+    REQUEST_COALESCING_LOG_INTERVAL запросов пишутся в лог
+    '''
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.coalesced = 0
+
+    def record(self, coalesced):
+        interval = settings.REQUEST_COALESCING_LOG_INTERVAL
+        with self.lock:
+            self.requests += 1
+            self.coalesced += coalesced
+            report = interval and self.requests % interval == 0
+        if report:
+            snapshot = self.snapshot()
+            logger.info(
+                'Объединение запросов в процессе %s: запросов %s, '
+                'объединено %s (%.1f%%)',
+                os.getpid(), snapshot['requests'], snapshot['coalesced'],
+                snapshot['ratio'] * 100,
+            )
+
+    @property
+    def ratio(self):
+        return self.coalesced / self.requests if self.requests else 0.0
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                'requests': self.requests,
+                'coalesced': self.coalesced,
+                'ratio': self.ratio,
+            }
+
+
+stats = CoalescingStats()
+
+
+class Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.response = None
+
+
+def request_key(request):
+    '''
+    Одинаковые запросы: тот же адрес с хостом и схемой (от них
+    зависят ссылки пагинации в ответе), формат ответа
+    и те же учетные данные
+    '''
+    return hashlib.md5(repr((
+        request.build_absolute_uri(),
+        request.META.get('HTTP_ACCEPT', ''),
+        request.META.get('HTTP_AUTHORIZATION', ''),
+        request.META.get('HTTP_COOKIE', ''),
+    )).encode()).hexdigest()
+
+
+def copy_response(response):
+    copy = HttpResponse(
+        response.content, status=response.status_code,
+        content_type=response['Content-Type'],
+    )
+    for header, value in response.items():
+        copy[header] = value
+    copy[COALESCED_HEADER] = '1'
+    return copy
+
+
+class RequestCoalescingMiddleware:
+    '''
+    Объединяет одинаковые GET-запросы, выполняющиеся одновременно
+    в одном процессе: ответ считает первый из них, остальные
+    получают его копию. Включается настройкой REQUEST_COALESCING
+    '''
+    def __init__(self, get_response):
+        if not settings.REQUEST_COALESCING:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.lock = threading.Lock()
+        self.in_flight = {}
+
+    def __call__(self, request):
+        if request.method != 'GET':
+            return self.get_response(request)
+        key = request_key(request)
+        with self.lock:
+            flight = self.in_flight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self.in_flight[key] = Flight()
+        if leader:
+            return self.lead(key, flight, request)
+        flight.done.wait(settings.REQUEST_COALESCING_TIMEOUT)
+        if flight.response is None:
+            stats.record(coalesced=False)
+            return self.get_response(request)
+        stats.record(coalesced=True)
+        return copy_response(flight.response)
+
+    def lead(self, key, flight, request):
+        try:
+            response = self.get_response(request)
+            # Потоковые ответы и ответы с cookies не раздаются
+            # другим запросам.
+            if not response.streaming and not response.cookies:
+                flight.response = response
+            return response
+        finally:
+            with self.lock:
+                del self.in_flight[key]
+            flight.done.set()
+            stats.record(coalesced=False)
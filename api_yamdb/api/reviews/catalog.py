@@ -0,0 +1,233 @@
+import string
+import threading
+import time
+from array import array
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection
+
+from api.caching import model_version
+from reviews.models import Category, Genre, Review, Title
+
+# Насколько раньше последней увиденной даты изменения перечитывать
+# произведения: записи, закоммиченные позже, могут иметь дату старше.
+REFRESH_OVERLAP = timedelta(seconds=5)
+# Изменения этих моделей могут поменять строки снимка.
+STAMP_MODELS = (Title, Review, Genre, Category)
+TITLE_FIELDS = (
+    'pk', 'name', 'year', 'category_id', 'rating', 'rating_count',
+    'weighted_rating', 'version', 'modified',
+)
+# LIKE в SQLite не учитывает регистр только для латиницы.
+ASCII_LOWER = str.maketrans(string.ascii_uppercase, string.ascii_lowercase)
+ORDERING_COLUMNS = {
+    'pk': 'ids',
+    'name': 'names',
+    'year': 'years',
+    'rating': 'ratings',
+    'rating_count': 'rating_counts',
+    'weighted_rating': 'weighted_ratings',
+}
+
+
+class TitleRow:
+    '''
+    Строка снимка с полями, нужными для ключа кэша представления:
+    вместо даты изменения хранится ее timestamp
+    '''
+    __slots__ = ('pk', 'version', 'timestamp')
+
+    def __init__(self, pk, version, timestamp):
+        self.pk = pk
+        self.version = version
+        self.timestamp = timestamp
+
+
+class CatalogSnapshot:
+    '''
+    Снимок каталога в памяти процесса: метаданные произведений
+    хранятся по колонкам в массивах, жанры - как множества
+    произведений. Обновляется по версиям моделей в кэше и датам
+    изменения произведений, поэтому пока каталог не меняется,
+    фильтрация не обращается к базе
+    '''
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.stamps = None
+        self.checked = 0
+        self.loaded = 0
+        self.watermark = None
+        self.genre_slugs = {}
+        self.category_slugs = {}
+        self.reset()
+
+    def reset(self):
+        self.positions = {}
+        self.ids = array('q')
+        self.names = []
+        self.years = array('l')
+        self.categories = array('q')
+        self.ratings = array('l')
+        self.rating_counts = array('q')
+        self.weighted_ratings = array('d')
+        self.versions = array('q')
+        self.timestamps = array('d')
+        self.genre_titles = {}
+
+    def refresh(self):
+        now = time.monotonic()
+        stamps = tuple(model_version(model) for model in STAMP_MODELS)
+        if None in stamps:
+            # Без версий в кэше изменения не отследить: снимок
+            # перечитается целиком, когда кэш снова станет доступен.
+            with self.lock:
+                self.stamps = None
+            return False
+        if (
+            stamps == self.stamps
+            and now - self.checked < settings.CATALOG_SNAPSHOT_REFRESH_INTERVAL
+        ):
+            return True
+        with self.lock:
+            if self.stamps is None or (
+                now - self.loaded > settings.CATALOG_SNAPSHOT_RELOAD_INTERVAL
+            ):
+                self.load()
+                self.loaded = now
+            else:
+                self.update(stamps)
+            self.stamps = stamps
+            self.checked = now
+        return True
+
+    def load(self):
+        self.reset()
+        self.watermark = None
+        self.load_groups()
+        self.upsert(Title.objects.values_list(*TITLE_FIELDS))
+
+    def update(self, stamps):
+        if stamps[2:] != self.stamps[2:]:
+            self.load_groups()
+        titles = Title.objects.values_list(*TITLE_FIELDS)
+        if self.watermark is not None:
+            titles = titles.filter(
+                modified__gte=self.watermark - REFRESH_OVERLAP
+            )
+        self.upsert(titles)
+        if stamps[0] != self.stamps[0]:
+            existing = set(Title.objects.values_list('pk', flat=True))
+            deleted = set(self.positions) - existing
+            if deleted:
+                self.remove(deleted)
+
+    def load_groups(self):
+        self.genre_slugs = dict(Genre.objects.values_list('slug', 'pk'))
+        self.category_slugs = dict(
+            Category.objects.values_list('slug', 'pk')
+        )
+
+    def upsert(self, titles):
+        changed = []
+        for (
+            pk, name, year, category_id, rating, rating_count,
+            weighted_rating, version, modified
+        ) in titles:
+            values = (
+                name, year, category_id or 0, rating, rating_count,
+                weighted_rating, version, modified.timestamp(),
+            )
+            position = self.positions.get(pk)
+            if position is None:
+                self.positions[pk] = len(self.ids)
+                self.ids.append(pk)
+                self.names.append(name)
+                for column, value in zip(self.value_columns(), values[1:]):
+                    column.append(value)
+            else:
+                self.names[position] = name
+                for column, value in zip(self.value_columns(), values[1:]):
+                    column[position] = value
+            if self.watermark is None or modified > self.watermark:
+                self.watermark = modified
+            changed.append(pk)
+        if not changed:
+            return
+        for titles_ids in self.genre_titles.values():
+            titles_ids.difference_update(changed)
+        links = Title.genre.through.objects.values_list('genre_id', 'title_id')
+        if len(changed) < len(self.ids):
+            links = links.filter(title_id__in=changed)
+        for genre_id, title_id in links:
+            self.genre_titles.setdefault(genre_id, set()).add(title_id)
+
+    def value_columns(self):
+        return (
+            self.years, self.categories, self.ratings, self.rating_counts,
+            self.weighted_ratings, self.versions, self.timestamps,
+        )
+
+    def remove(self, deleted):
+        keep = [
+            position for position, pk in enumerate(self.ids)
+            if pk not in deleted
+        ]
+        self.names = [self.names[i] for i in keep]
+        for name in ('ids', 'years', 'categories', 'ratings', 'rating_counts',
+                     'weighted_ratings', 'versions', 'timestamps'):
+            column = getattr(self, name)
+            setattr(self, name, array(
+                column.typecode, (column[i] for i in keep)
+            ))
+        self.positions = {pk: position for position, pk in enumerate(self.ids)}
+        for titles_ids in self.genre_titles.values():
+            titles_ids.difference_update(deleted)
+
+    def filter(self, name=None, genre=None, category=None, year=None,
+               ordering=('pk',)):
+        '''
+        Строки произведений, подходящих под фильтры TitleFilter,
+        в порядке ordering; None, если снимок нельзя обновить
+        '''
+        if not self.refresh():
+            return None
+        with self.lock:
+            positions = range(len(self.ids))
+            if genre is not None:
+                titles_ids = self.genre_titles.get(
+                    self.genre_slugs.get(genre), ()
+                )
+                positions = sorted(
+                    self.positions[pk] for pk in titles_ids
+                    if pk in self.positions
+                )
+            if category is not None:
+                category_id = self.category_slugs.get(category)
+                positions = [
+                    i for i in positions if self.categories[i] == category_id
+                ]
+            if year is not None:
+                positions = [i for i in positions if self.years[i] == year]
+            if name is not None:
+                fold = (
+                    (lambda value: value.translate(ASCII_LOWER))
+                    if connection.vendor == 'sqlite' else str.lower
+                )
+                name = fold(name)
+                positions = [
+                    i for i in positions if name in fold(self.names[i])
+                ]
+            positions = list(positions)
+            for term in reversed(ordering):
+                column = getattr(self, ORDERING_COLUMNS[term.lstrip('-')])
+                positions.sort(
+                    key=column.__getitem__, reverse=term.startswith('-')
+                )
+            return [
+                TitleRow(self.ids[i], self.versions[i], self.timestamps[i])
+                for i in positions
+            ]
+
+
+catalog = CatalogSnapshot()
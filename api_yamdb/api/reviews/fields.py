@@ -0,0 +1,116 @@
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from django.utils.encoding import smart_str
+from rest_framework import serializers
+from rest_framework.relations import MANY_RELATION_KWARGS, ManyRelatedField
+
+from api.caching import model_version
+
+
+class SlugResolver:
+    """
+    Процессный LRU-кэш соответствия slug -> id для модели.
+    Сбрасывается при смене версии модели, то есть после любой записи
+    в нее; промахи разрешаются одним запросом slug IN (...).
+    Без версии в кэше соответствия не запоминаются
+    """
+    def __init__(self, model, maxsize):
+        self.model = model
+        self.maxsize = maxsize
+        self.lock = threading.Lock()
+        self.ids = OrderedDict()
+        self.version = None
+
+    def resolve(self, slugs):
+        version = model_version(self.model)
+        found = {}
+        with self.lock:
+            if version != self.version:
+                self.ids.clear()
+                self.version = version
+            for slug in slugs:
+                if slug in self.ids:
+                    self.ids.move_to_end(slug)
+                    found[slug] = self.ids[slug]
+        missing = set(slugs) - found.keys()
+        if not missing:
+            return found
+        loaded = dict(self.model.objects.filter(
+            slug__in=missing
+        ).values_list('slug', 'pk'))
+        found.update(loaded)
+        with self.lock:
+            if version is not None and version == self.version:
+                self.ids.update(loaded)
+                while len(self.ids) > self.maxsize:
+                    self.ids.popitem(last=False)
+        return found
+
+    def instance(self, slug, pk, using):
+        """
+        Объект модели только с id и slug, без запроса к базе
+        """
+        return self.model.from_db(using, ('id', 'slug'), (pk, slug))
+
+
+resolvers = {}
+resolvers_lock = threading.Lock()
+
+
+def get_resolver(model):
+    with resolvers_lock:
+        if model not in resolvers:
+            resolvers[model] = SlugResolver(
+                model, settings.SLUG_RESOLVER_CACHE_SIZE
+            )
+        return resolvers[model]
+
+
+class CachedSlugRelatedField(serializers.SlugRelatedField):
+    """
+    SlugRelatedField по полю slug, который берет id из SlugResolver
+    вместо отдельного SELECT на каждое значение
+    """
+    @classmethod
+    def many_init(cls, *args, **kwargs):
+        list_kwargs = {'child_relation': cls(*args, **kwargs)}
+        for key in kwargs:
+            if key in MANY_RELATION_KWARGS:
+                list_kwargs[key] = kwargs[key]
+        return CachedManySlugRelatedField(**list_kwargs)
+
+    def to_slug(self, data):
+        if isinstance(data, bool) or not isinstance(data, (str, int)):
+            self.fail('invalid')
+        return smart_str(data)
+
+    def resolve(self, slugs):
+        queryset = self.get_queryset()
+        resolver = get_resolver(queryset.model)
+        found = resolver.resolve(slugs)
+        for slug in slugs:
+            if slug not in found:
+                self.fail(
+                    'does_not_exist', slug_name=self.slug_field, value=slug
+                )
+        return [resolver.instance(slug, found[slug], queryset.db)
+                for slug in slugs]
+
+    def to_internal_value(self, data):
+        return self.resolve([self.to_slug(data)])[0]
+
+
+class CachedManySlugRelatedField(ManyRelatedField):
+    """
+    Список slug, который разрешается целиком за одно обращение
+    к SlugResolver
+    """
+    def to_internal_value(self, data):
+        if isinstance(data, str) or not hasattr(data, '__iter__'):
+            self.fail('not_a_list', input_type=type(data).__name__)
+        if not self.allow_empty and len(data) == 0:
+            self.fail('empty')
+        slugs = [self.child_relation.to_slug(item) for item in data]
+        return self.child_relation.resolve(slugs)
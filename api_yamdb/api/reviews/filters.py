@@ -1,5 +1,7 @@
 from django_filters.rest_framework import CharFilter, FilterSet
+from rest_framework.filters import OrderingFilter
 from reviews.models import Title
+from reviews.search import search_titles
 
 
 class TitleFilter(FilterSet):
@@ -9,7 +11,38 @@ class TitleFilter(FilterSet):
     name = CharFilter(lookup_expr='icontains')
     genre = CharFilter(field_name='genre__slug')
     category = CharFilter(field_name='category__slug')
+    search = CharFilter(method='filter_search')
 
     class Meta:
         model = Title
         fields = ['year']
+
+    def filter_search(self, queryset, name, value):
+        return search_titles(queryset, value)
+
+
+class TitleOrderingFilter(OrderingFilter):
+    """
+    Сортировка произведений по параметру ordering.
+    Публичные имена полей переводятся в поля модели, а для
+    стабильного порядка страниц в конец добавляется pk
+    """
+    field_aliases = {'review_count': 'rating_count'}
+
+    def filter_queryset(self, request, queryset, view):
+        if self.ordering_param not in request.query_params:
+            # Сохраняем порядок вьюсета или релевантность поиска.
+            return queryset
+        return super().filter_queryset(request, queryset, view)
+
+    def remove_invalid_fields(self, queryset, fields, view, request):
+        ordering = []
+        for term in super().remove_invalid_fields(
+            queryset, fields, view, request
+        ):
+            prefix = '-' if term.startswith('-') else ''
+            field = term.lstrip('-')
+            ordering.append(prefix + self.field_aliases.get(field, field))
+        if ordering and ordering[-1].lstrip('-') != 'pk':
+            ordering.append('-pk' if ordering[0].startswith('-') else 'pk')
+        return ordering
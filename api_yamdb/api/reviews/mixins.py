@@ -1,9 +1,106 @@
+import hashlib
+
+from django.conf import settings
+from django.utils.cache import (
+    get_conditional_response,
+    patch_cache_control,
+    patch_vary_headers,
+    quote_etag)
+from django.utils.http import http_date
 from rest_framework import filters, mixins, viewsets
+from rest_framework.decorators import action
+from rest_framework.response import Response
+from api.caching import get_or_compute, response_key, title_response_key
+from api.reviews.catalog import catalog
 from api.users.permissions import (IsAdminOrReadOnly)
-from rest_framework.pagination import PageNumberPagination
+from api.reviews.pagination import CachedCountPagination
+
+from reviews.models import Leaderboard, Title
+
+
+class CachedListMixin:
+    """
+    Кэширует ответ на GET-запрос списка по URL запроса.
+    Ключ содержит версию модели, поэтому любая запись в модель,
+    в том числе через админку, сразу делает кэш неактуальным
+    """
+    list_cache_timeout = settings.LIST_CACHE_TIMEOUT
+
+    def list(self, request, *args, **kwargs):
+        key = response_key(self.queryset.model, request)
+        return Response(get_or_compute(
+            key,
+            lambda: super(CachedListMixin, self).list(
+                request, *args, **kwargs
+            ).data,
+            self.list_cache_timeout
+        ))
+
+
+class TitleVersionCachedListMixin:
+    """
+    Кэширует списки отзывов и комментариев произведения.
+    Ключ содержит счетчик версий произведения, который растет при
+    любой записи в них, поэтому сброс кэша не требует перебора ключей
+    """
+    list_cache_timeout = settings.LIST_CACHE_TIMEOUT
+
+    def list(self, request, *args, **kwargs):
+        title_id = self.kwargs['title_id']
+        version = Title.objects.filter(pk=title_id).values_list(
+            'version', flat=True
+        ).first()
+        if version is None:
+            return super().list(request, *args, **kwargs)
+        key = title_response_key(title_id, version, request)
+        return Response(get_or_compute(
+            key,
+            lambda: super(TitleVersionCachedListMixin, self).list(
+                request, *args, **kwargs
+            ).data,
+            self.list_cache_timeout
+        ))
+
+
+class CacheControlMixin:
+    """
+    Разрешает прокси и браузерам кэшировать успешные ответы на
+    анонимные GET-запросы. Время жизни берется из настройки
+    CACHE_CONTROL по basename вьюсета. Остальные ответы
+    помечаются как private, no-store
+    """
+    def get_cache_control(self):
+        return settings.CACHE_CONTROL.get(
+            self.basename, settings.CACHE_CONTROL['default']
+        )
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(
+            request, response, *args, **kwargs
+        )
+        # Аутентификация только по JWT, поэтому анонимный запрос -
+        # это запрос без заголовка Authorization.
+        if (
+            request.method in ('GET', 'HEAD')
+            and 'HTTP_AUTHORIZATION' not in request.META
+            and response.status_code in (200, 304)
+        ):
+            max_age, stale_while_revalidate = self.get_cache_control()
+            patch_cache_control(
+                response, public=True, max_age=max_age,
+                stale_while_revalidate=stale_while_revalidate
+            )
+        else:
+            patch_cache_control(response, private=True, no_store=True)
+        # Формат ответа (JSON или страница browsable API) выбирается
+        # по Accept.
+        patch_vary_headers(response, ('Accept', 'Authorization'))
+        return response
 
 
 class ListCreateDestroyViewSet(
+    CacheControlMixin,
+    CachedListMixin,
     mixins.ListModelMixin,
     mixins.CreateModelMixin,
     mixins.DestroyModelMixin,
@@ -16,4 +113,125 @@ class ListCreateDestroyViewSet(
     filter_backends = [filters.SearchFilter]
     search_fields = ['name']
     permission_classes = (IsAdminOrReadOnly,)
-    pagination_class = PageNumberPagination
+    pagination_class = CachedCountPagination
+
+
+class TopTitlesMixin:
+    """
+    Добавляет вьюсету жанров или категорий эндпоинт {slug}/top/
+    с заранее посчитанным топом произведений
+    """
+    leaderboard_field = None
+    top_serializer_class = None
+
+    @action(methods=['GET'], detail=True)
+    def top(self, request, slug=None):
+        group = self.get_object()
+        entries = Leaderboard.objects.filter(
+            **{self.leaderboard_field: group}
+        ).select_related('title__category')
+        serializer = self.top_serializer_class(
+            [entry.title for entry in entries], many=True,
+            context=self.get_serializer_context()
+        )
+        return Response(serializer.data)
+
+
+class CatalogSnapshotListMixin:
+    """
+    Отдает список произведений по снимку каталога в памяти,
+    если он включен настройкой CATALOG_SNAPSHOT и запрос
+    использует только поддерживаемые им фильтры
+    """
+    snapshot_filters = ('name', 'genre', 'category', 'year')
+    snapshot_unsupported = ('search', 'cursor')
+
+    def get_snapshot_filters(self, request):
+        params = request.query_params
+        if any(params.get(name) for name in self.snapshot_unsupported):
+            return None
+        filters = {
+            name: params[name] for name in self.snapshot_filters
+            if params.get(name)
+        }
+        if 'year' in filters:
+            if not filters['year'].isdigit():
+                return None
+            filters['year'] = int(filters['year'])
+        ordering = ['pk']
+        for backend in self.filter_backends:
+            if hasattr(backend, 'get_ordering') and (
+                backend.ordering_param in params
+            ):
+                ordering = backend().get_ordering(
+                    request, self.get_queryset(), self
+                )
+        filters['ordering'] = ordering
+        return filters
+
+    def list(self, request, *args, **kwargs):
+        filters = None
+        if settings.CATALOG_SNAPSHOT:
+            filters = self.get_snapshot_filters(request)
+        rows = None if filters is None else catalog.filter(**filters)
+        if rows is None:
+            return super().list(request, *args, **kwargs)
+        page = self.paginate_queryset(rows)
+        serializer = self.get_serializer(
+            rows if page is None else page, many=True
+        )
+        if page is None:
+            return Response(serializer.data)
+        return self.get_paginated_response(serializer.data)
+
+
+class ConditionalGetMixin:
+    """
+    Отвечает 304 на условные GET-запросы к списку и объекту,
+    не выполняя сериализацию. ETag и Last-Modified строятся по
+    версии ресурса из get_list_state и get_object_state
+    """
+    def get_list_state(self):
+        """
+        Версия и время изменения списка или None
+        """
+        return None
+
+    def get_object_state(self, instance):
+        """
+        Версия и время изменения загруженного объекта
+        """
+        return instance.modified.isoformat(), instance.modified
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_get(
+            request, self.get_list_state(),
+            lambda: super(ConditionalGetMixin, self).list(
+                request, *args, **kwargs
+            )
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        return self.conditional_get(
+            request, self.get_object_state(instance),
+            lambda: Response(self.get_serializer(instance).data)
+        )
+
+    def conditional_get(self, request, state, render):
+        if state is None:
+            return render()
+        version, modified = state
+        etag = quote_etag(hashlib.md5(
+            f'{request.get_full_path()}:{request.accepted_media_type}:'
+            f'{version}'.encode()
+        ).hexdigest())
+        last_modified = int(modified.timestamp())
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if response is None:
+            response = render()
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+        return response
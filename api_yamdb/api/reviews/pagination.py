@@ -0,0 +1,125 @@
+import json
+
+from django.core.paginator import Paginator
+from django.db.models import Q, QuerySet
+from django.utils.functional import cached_property
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import (
+    CursorPagination, PageNumberPagination, _reverse_ordering
+)
+
+from api.caching import cached_count
+
+
+class CachedCountPaginator(Paginator):
+    """
+    Пагинатор, который берет число объектов выборки из кэша
+    """
+    @cached_property
+    def count(self):
+        if not isinstance(self.object_list, QuerySet):
+            return len(self.object_list)
+        return cached_count(self.object_list)
+
+
+class CachedCountPagination(PageNumberPagination):
+    """
+    Постраничная пагинация без COUNT(*) на каждый запрос
+    """
+    django_paginator_class = CachedCountPaginator
+
+
+def keyset_filter(ordering, values):
+    """
+    Условие "после позиции" для сортировки по нескольким полям:
+    (a > x) OR (a = x AND b > y) OR ...
+    """
+    condition = Q()
+    equal = {}
+    for term, value in zip(ordering, values):
+        field = term.lstrip('-')
+        lookup = '__lt' if term.startswith('-') else '__gt'
+        condition |= Q(**equal, **{field + lookup: value})
+        equal[field] = value
+    return condition
+
+
+class TitleCursorPagination(CursorPagination):
+    """
+    Курсорная пагинация произведений: страница выбирается по ключу
+    сортировки, а не через OFFSET, и не требует COUNT(*).
+    Позиция курсора составная - значения всех полей сортировки,
+    которая всегда заканчивается на pk. Поэтому позиция уникальна,
+    и одинаковые значения первого поля не превращаются в OFFSET
+    """
+    ordering = 'pk'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        cursor = super().decode_cursor(request)
+        self.keyset_cursor = cursor
+        if cursor is None or cursor.position is None:
+            return super().paginate_queryset(queryset, request, view)
+        ordering = self.get_ordering(request, queryset, view)
+        if cursor.reverse:
+            ordering = _reverse_ordering(ordering)
+        queryset = queryset.filter(
+            keyset_filter(ordering, self.load_position(cursor, ordering))
+        )
+        page = super().paginate_queryset(queryset, request, view)
+        # Родитель получил курсор без позиции, возвращаем ее в ссылки.
+        self.cursor = cursor
+        if cursor.reverse:
+            self.has_next, self.next_position = True, cursor.position
+        else:
+            self.has_previous, self.previous_position = True, cursor.position
+        if self.template is not None:
+            self.display_page_controls = True
+        return page
+
+    def decode_cursor(self, request):
+        # Родитель сравнивает позицию только с первым полем сортировки,
+        # фильтр по составной позиции уже применен в paginate_queryset.
+        cursor = self.keyset_cursor
+        return cursor and cursor._replace(position=None)
+
+    def load_position(self, cursor, ordering):
+        try:
+            values = json.loads(cursor.position)
+        except ValueError:
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(values, list) or len(values) != len(ordering):
+            raise NotFound(self.invalid_cursor_message)
+        return values
+
+    def _get_position_from_instance(self, instance, ordering):
+        return json.dumps([
+            getattr(instance, term.lstrip('-')) for term in ordering
+        ])
+
+
+class TitlePagination(CachedCountPagination):
+    """
+    Постраничная пагинация произведений, которая переходит
+    на курсорную, если в запросе передан параметр cursor
+    """
+    cursor_query_param = 'cursor'
+    cursor_pagination_class = TitleCursorPagination
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor_paginator = None
+        if self.cursor_query_param in request.query_params:
+            self.cursor_paginator = self.cursor_pagination_class()
+            return self.cursor_paginator.paginate_queryset(
+                queryset, request, view
+            )
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.cursor_paginator:
+            return self.cursor_paginator.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+    def to_html(self):
+        if self.cursor_paginator:
+            return self.cursor_paginator.to_html()
+        return super().to_html()
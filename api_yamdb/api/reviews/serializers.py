@@ -1,6 +1,11 @@
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db.models import Manager, prefetch_related_objects
 from rest_framework import serializers
 
+from api.caching import title_fragment_key
+from api.reviews.fields import CachedSlugRelatedField
 from reviews.models import Category, Comment, Genre, Review, Title
 
 
@@ -24,7 +29,7 @@ class ReviewSerializer(serializers.ModelSerializer):
     def validate(self, data):
         title_id = self.context.get('title_id')
         if self.context['request'].method == 'POST' and Review.objects.filter(
-            title=title_id, author=self.context['request'].user
+            title=title_id, author_id=self.context['request'].user.id
         ).exists():
             raise serializers.ValidationError(
                 'Вы уже оставляли отзыв на это произведение.')
@@ -73,13 +78,23 @@ class GenreSerializer(serializers.ModelSerializer):
         )
 
 
+class CachedTitleListSerializer(serializers.ListSerializer):
+    """
+    Собирает список произведений из закэшированных представлений
+    """
+    def to_representation(self, data):
+        return self.child.render_many(
+            data.all() if isinstance(data, Manager) else data
+        )
+
+
 class ListDetailedTitleSerializer(serializers.ModelSerializer):
     """
     Сериализатор для модели подсчета среднего рейтинга
     """
     genre = GenreSerializer(many=True)
     category = CategorySerializer()
-    rating = serializers.IntegerField(read_only=True)
+    rating = serializers.SerializerMethodField()
 
     class Meta:
         model = Title
@@ -92,16 +107,80 @@ class ListDetailedTitleSerializer(serializers.ModelSerializer):
             'description',
             'rating'
         )
+        list_serializer_class = CachedTitleListSerializer
+
+    def get_rating(self, obj):
+        if not obj.rating_count:
+            return None
+        return obj.rating
+
+    def serialize(self, instance):
+        return super().to_representation(instance)
+
+    def render_many(self, titles):
+        """
+        Представления произведений или строк снимка каталога.
+        Заново сериализуются только отсутствующие в кэше, жанры
+        для них догружаются одним запросом, а строки снимка
+        загружаются из базы
+        """
+        titles = list(titles)
+        keys = {
+            title.pk: title_fragment_key(
+                title.pk, title.version,
+                title.modified.timestamp() if isinstance(title, Title)
+                else title.timestamp
+            )
+            for title in titles
+        }
+        # Без ключей (кэш недоступен) сериализуются все произведения.
+        cached = cache.get_many(
+            [key for key in keys.values() if key is not None]
+        )
+        fragments = {
+            pk: cached[key] for pk, key in keys.items() if key in cached
+        }
+        misses = [title for title in titles if title.pk not in fragments]
+        if misses:
+            instances = [t for t in misses if isinstance(t, Title)]
+            prefetch_related_objects(instances, 'genre')
+            loaded = {title.pk: title for title in instances}
+            rows = [t.pk for t in misses if not isinstance(t, Title)]
+            if rows:
+                loaded.update(Title.objects.select_related(
+                    'category'
+                ).prefetch_related('genre').in_bulk(rows))
+            fresh = {pk: self.serialize(title) for pk, title in loaded.items()}
+            cache.set_many({
+                keys[pk]: fragment for pk, fragment in fresh.items()
+                if keys[pk] is not None
+            }, settings.TITLE_FRAGMENT_CACHE_TIMEOUT)
+            fragments.update(fresh)
+        return [
+            fragments[title.pk] for title in titles if title.pk in fragments
+        ]
+
+    def to_representation(self, instance):
+        key = title_fragment_key(
+            instance.pk, instance.version, instance.modified.timestamp()
+        )
+        if key is None:
+            return self.serialize(instance)
+        fragment = cache.get(key)
+        if fragment is None:
+            fragment = self.serialize(instance)
+            cache.set(key, fragment, settings.TITLE_FRAGMENT_CACHE_TIMEOUT)
+        return fragment
 
 
 class TitleSerializer(serializers.ModelSerializer):
     """
     Сериализатор для модели произведения
     """
-    genre = serializers.SlugRelatedField(
+    genre = CachedSlugRelatedField(
         slug_field='slug', many=True, queryset=Genre.objects.all()
     )
-    category = serializers.SlugRelatedField(
+    category = CachedSlugRelatedField(
         slug_field='slug', queryset=Category.objects.all()
     )
 
@@ -1,15 +1,27 @@
 from django.contrib.auth import get_user_model
 from django.core.exceptions import PermissionDenied
-from django.db.models import Avg
+from django.db.models import Count, F, Max
 from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import viewsets
-from rest_framework.pagination import PageNumberPagination
-
-from reviews.models import Category, Genre, Review, Title
-
-from api.reviews.filters import TitleFilter
-from api.reviews.mixins import ListCreateDestroyViewSet
+from rest_framework.decorators import action
+from rest_framework.response import Response
+
+from reviews.constants import SCORES
+from reviews.models import (
+    Category, Comment, Genre, Review, Title, score_count_field
+)
+
+from api.reviews.filters import TitleFilter, TitleOrderingFilter
+from api.caching import model_version
+from api.reviews.mixins import (
+    CacheControlMixin,
+    CatalogSnapshotListMixin,
+    ConditionalGetMixin,
+    ListCreateDestroyViewSet,
+    TitleVersionCachedListMixin,
+    TopTitlesMixin)
+from api.reviews.pagination import CachedCountPagination, TitlePagination
 from api.users.permissions import (
     IsAdminorIsModerorIsSuperUser,
     IsAdminOrReadOnly)
@@ -24,48 +36,110 @@ from api.reviews.serializers import (
 
 User = get_user_model()
 
+HISTOGRAM_FIELDS = tuple(score_count_field(score) for score in SCORES)
+
 
-class CategoryViewSet(ListCreateDestroyViewSet):
+class CategoryViewSet(TopTitlesMixin, ListCreateDestroyViewSet):
     '''
     Работа с категориями
     '''
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
+    leaderboard_field = 'category'
+    top_serializer_class = ListDetailedTitleSerializer
 
 
-class GenreViewSet(ListCreateDestroyViewSet):
+class GenreViewSet(TopTitlesMixin, ListCreateDestroyViewSet):
     """
     Работа с жанрами
     """
     queryset = Genre.objects.all()
     serializer_class = GenreSerializer
+    leaderboard_field = 'genre'
+    top_serializer_class = ListDetailedTitleSerializer
 
 
-class TitleViewSet(viewsets.ModelViewSet):
+class TitleViewSet(
+    CacheControlMixin,
+    ConditionalGetMixin,
+    CatalogSnapshotListMixin,
+    viewsets.ModelViewSet
+):
     '''
     Работа с произведениями
     '''
     http_method_names = ['get', 'delete', 'post', 'head', 'options', 'patch']
-    queryset = Title.objects.order_by('pk').annotate(
-        rating=Avg('reviews__score'))
+    # Жанры догружает сериализатор и только для произведений,
+    # которых нет в кэше представлений.
+    queryset = Title.objects.select_related('category').order_by('pk')
     permission_classes = (IsAdminOrReadOnly,)
-    filter_backends = (DjangoFilterBackend,)
+    filter_backends = (DjangoFilterBackend, TitleOrderingFilter)
     filterset_class = TitleFilter
+    ordering_fields = (
+        'rating', 'weighted_rating', 'year', 'review_count', 'name'
+    )
+    ordering = ('pk',)
+    pagination_class = TitlePagination
 
     def get_serializer_class(self):
         if self.request.method in ('GET',):
             return ListDetailedTitleSerializer
         return TitleSerializer
 
-
-class ReviewViewSet(viewsets.ModelViewSet):
+    def get_object_state(self, instance):
+        # В ответ вложены жанры и категория, их переименование
+        # тоже меняет представление произведения. Без их версий
+        # (кэш недоступен) ETag не выдается.
+        genre, category = model_version(Genre), model_version(Category)
+        if genre is None or category is None:
+            return None
+        version = f'{instance.modified.isoformat()}:{genre}:{category}'
+        return version, instance.modified
+
+    @action(methods=['GET'], detail=True)
+    def histogram(self, request, pk=None):
+        title = get_object_or_404(
+            Title.objects.only(*HISTOGRAM_FIELDS), pk=pk
+        )
+        return Response({
+            'id': title.pk,
+            'histogram': title.score_histogram,
+        })
+
+    @action(methods=['GET'], detail=False)
+    def facets(self, request):
+        titles = self.filter_queryset(self.get_queryset()).order_by()
+        genres = Title.genre.through.objects.filter(
+            title_id__in=titles.values('pk')
+        ).values(slug=F('genre__slug')).annotate(
+            count=Count('title_id')
+        ).order_by('slug')
+        categories = titles.filter(category__isnull=False).values(
+            slug=F('category__slug')
+        ).annotate(count=Count('pk')).order_by('slug')
+        years = titles.values('year').annotate(
+            count=Count('pk')
+        ).order_by('year')
+        return Response({
+            'genre': list(genres),
+            'category': list(categories),
+            'year': list(years),
+        })
+
+
+class ReviewViewSet(
+    CacheControlMixin,
+    ConditionalGetMixin,
+    TitleVersionCachedListMixin,
+    viewsets.ModelViewSet
+):
     '''
     Работа с отзывами
     '''
     http_method_names = ['get', 'delete', 'post', 'head', 'options', 'patch']
     serializer_class = ReviewSerializer
     permission_classes = (IsAdminorIsModerorIsSuperUser,)
-    pagination_class = PageNumberPagination
+    pagination_class = CachedCountPagination
 
     def object_title(self):
         return get_object_or_404(
@@ -74,30 +148,55 @@ class ReviewViewSet(viewsets.ModelViewSet):
         )
 
     def get_queryset(self):
-        title = self.object_title()
-        return title.reviews.all()
+        if self.detail:
+            # Отзыв ищется сразу с условием на произведение,
+            # без отдельного запроса самого произведения.
+            return Review.objects.filter(
+                title_id=self.kwargs['title_id']
+            ).select_related('author')
+        return self.object_title().reviews.select_related('author')
 
     def perform_create(self, serializer):
         title = self.object_title()
-        review = Review.objects.filter(title=title, author=self.request.user)
+        review = Review.objects.filter(
+            title=title, author_id=self.request.user.id
+        )
         if review.exists():
             raise PermissionDenied(
                 'Вы уже оставляли отзыва на это произведение.'
             )
-        serializer.save(author=self.request.user, title=title)
+        serializer.save(author_id=self.request.user.id, title=title)
 
     def get_serializer_context(self):
         return {'title_id': self.kwargs['title_id'], 'request': self.request}
 
+    def get_list_state(self):
+        # Удаление отзыва меняет рейтинг и дату изменения произведения.
+        state = Title.objects.filter(pk=self.kwargs['title_id']).annotate(
+            last_review=Max('reviews__modified'),
+            review_count=Count('reviews'),
+        ).values('modified', 'last_review', 'review_count').first()
+        if state is None:
+            return None
+        modified = max(
+            filter(None, (state['modified'], state['last_review']))
+        )
+        return f'{modified.isoformat()}:{state["review_count"]}', modified
+
 
-class CommentViewSet(viewsets.ModelViewSet):
+class CommentViewSet(
+    CacheControlMixin,
+    ConditionalGetMixin,
+    TitleVersionCachedListMixin,
+    viewsets.ModelViewSet
+):
     '''
     Работа с комментариями
     '''
     http_method_names = ['get', 'delete', 'post', 'head', 'options', 'patch']
     serializer_class = CommentSerializer
     permission_classes = (IsAdminorIsModerorIsSuperUser,)
-    pagination_class = PageNumberPagination
+    pagination_class = CachedCountPagination
 
     def object_review(self):
         return get_object_or_404(
@@ -107,9 +206,28 @@ class CommentViewSet(viewsets.ModelViewSet):
         )
 
     def get_queryset(self):
-        review = self.object_review()
-        return review.comments.all()
+        if self.detail:
+            return Comment.objects.filter(
+                review_id=self.kwargs['review_id'],
+                review__title_id=self.kwargs['title_id'],
+            ).select_related('author')
+        return self.object_review().comments.select_related('author')
 
     def perform_create(self, serializer):
         review = self.object_review()
-        serializer.save(author=self.request.user, review=review)
+        serializer.save(author_id=self.request.user.id, review=review)
+
+    def get_list_state(self):
+        # Удаление комментария меняет дату изменения отзыва.
+        state = Review.objects.filter(
+            pk=self.kwargs['review_id'], title_id=self.kwargs['title_id']
+        ).annotate(
+            last_comment=Max('comments__modified'),
+            comment_count=Count('comments'),
+        ).values('modified', 'last_comment', 'comment_count').first()
+        if state is None:
+            return None
+        modified = max(
+            filter(None, (state['modified'], state['last_comment']))
+        )
+        return f'{modified.isoformat()}:{state["comment_count"]}', modified
@@ -0,0 +1,97 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import (
+    m2m_changed, post_delete, post_init, post_save
+)
+from django.db.models import F
+from django.dispatch import receiver
+from django.utils import timezone
+
+from api.caching import bump_model_version
+from api.users.authentication import forget_user_claims
+from reviews.models import Category, Comment, Genre, Review, Title
+
+User = get_user_model()
+
+VERSIONED_MODELS = (Category, Comment, Genre, Review, Title, User)
+
+
+@receiver(post_save)
+@receiver(post_delete)
+def bump_changed_model_version(sender, **kwargs):
+    '''
+    Сбрасывает кэш выборок модели после ее изменения.
+    Выборки произведений фильтруются по жанрам и категориям,
+    поэтому их изменения сбрасывают и кэш произведений
+    '''
+    if sender not in VERSIONED_MODELS:
+        return
+    bump_model_version(sender)
+    if sender in (Category, Genre):
+        bump_model_version(Title)
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def bump_title_genres_version(sender, instance, action, reverse, pk_set,
+                              **kwargs):
+    '''
+    Смена жанров меняет представление произведения, поэтому
+    увеличивает и его собственную версию и дату изменения
+    '''
+    if reverse and action == 'pre_clear':
+        instance._cleared_title_ids = list(
+            Title.objects.filter(genre=instance).values_list('pk', flat=True)
+        )
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    bump_model_version(Title)
+    if not reverse:
+        title_ids = [instance.pk]
+    elif action == 'post_clear':
+        title_ids = getattr(instance, '_cleared_title_ids', ())
+    else:
+        title_ids = pk_set
+    Title.objects.filter(pk__in=title_ids).update(
+        version=F('version') + 1, modified=timezone.now()
+    )
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def forget_changed_user_claims(sender, instance, **kwargs):
+    '''
+    Смена роли или блокировка пользователя действует сразу,
+    не дожидаясь повторной сверки данных токена
+    '''
+    forget_user_claims(instance.pk)
+
+
+@receiver(post_init, sender=User)
+def remember_loaded_username(sender, instance, **kwargs):
+    instance._loaded_username = instance.__dict__.get('username')
+
+
+@receiver(post_save, sender=User)
+def bump_authored_titles_version(sender, instance, created, **kwargs):
+    '''
+    Отзывы и комментарии содержат username автора, поэтому его смена
+    обновляет их дату изменения (от нее зависит ETag) и увеличивает
+    версии произведений, к которым пользователь писал отзывы
+    или комментарии (от них зависит кэш списков)
+    '''
+    previous = instance._loaded_username
+    instance._loaded_username = instance.username
+    if created or previous == instance.username:
+        return
+    now = timezone.now()
+    reviews = Review.objects.filter(author=instance)
+    comments = Comment.objects.filter(author=instance)
+    reviews.update(modified=now)
+    comments.update(modified=now)
+    title_ids = set(reviews.values_list('title_id', flat=True)) | set(
+        comments.values_list('review__title_id', flat=True)
+    )
+    if title_ids:
+        bump_model_version(Title)
+        Title.objects.filter(pk__in=title_ids).update(
+            version=F('version') + 1, modified=now
+        )
@@ -0,0 +1,101 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from users.models import UserRoleMixin
+
+User = get_user_model()
+
+CLAIM_FIELDS = ('username', 'role', 'is_staff', 'is_superuser')
+USER_CLAIMS_KEY = 'user-claims:{user_id}'
+
+
+def access_token_for(user):
+    '''
+    Токен доступа с данными пользователя, нужными для проверки прав
+    '''
+    token = AccessToken.for_user(user)
+    for field in CLAIM_FIELDS:
+        token[field] = getattr(user, field)
+    return token
+
+
+def user_claims(user_id, timeout):
+    '''
+    Актуальные данные пользователя из базы, закэшированные на timeout
+    секунд. Кэш сбрасывается при изменении пользователя
+    '''
+    key = USER_CLAIMS_KEY.format(user_id=user_id)
+    claims = cache.get(key)
+    if claims is None:
+        claims = User.objects.filter(pk=user_id, is_active=True).values(
+            *CLAIM_FIELDS
+        ).first()
+        if claims is None:
+            raise AuthenticationFailed(
+                _('User not found'), code='user_not_found'
+            )
+        cache.set(key, claims, timeout)
+    return claims
+
+
+def forget_user_claims(user_id):
+    cache.delete(USER_CLAIMS_KEY.format(user_id=user_id))
+
+
+class ClaimsUser(UserRoleMixin, TokenUser):
+    '''
+    Пользователь, собранный из данных токена без загрузки из базы
+    '''
+    def __init__(self, token, claims):
+        super().__init__(token)
+        self.claims = claims
+
+    @property
+    def username(self):
+        return self.claims['username']
+
+    @property
+    def role(self):
+        return self.claims['role']
+
+    @property
+    def is_staff(self):
+        return self.claims['is_staff']
+
+    @property
+    def is_superuser(self):
+        return self.claims['is_superuser']
+
+    def __eq__(self, other):
+        return self.pk == getattr(other, 'pk', None)
+
+    def __hash__(self):
+        return hash(self.pk)
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    '''
+    JWT-аутентификация без запроса пользователя на каждый запрос.
+    Роль и флаги берутся из токена; если задан интервал
+    JWT_CLAIMS_REVALIDATE_INTERVAL, они сверяются с базой не чаще
+    раза за интервал. Токены без этих данных сверяются всегда
+    '''
+    def get_user(self, validated_token):
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        if user_id is None:
+            return super().get_user(validated_token)
+        interval = settings.JWT_CLAIMS_REVALIDATE_INTERVAL
+        if interval is None and all(
+            field in validated_token for field in CLAIM_FIELDS
+        ):
+            claims = {field: validated_token[field] for field in CLAIM_FIELDS}
+        else:
+            claims = user_claims(user_id, interval)
+        return ClaimsUser(validated_token, claims)
@@ -17,7 +17,9 @@ class IsAdminOrReadOnly(BasePermission):
 
 class IsAdminorIsModerorIsSuperUser(BasePermission):
     """
-    Права на редактирование всем кроме анона
+    Права на редактирование всем кроме анона.
+    Роль берется из токена, автор сравнивается по id,
+    поэтому проверка не обращается к базе
     """
     def has_permission(self, request, view):
         return request.method in SAFE_METHODS or request.user.is_authenticated
@@ -34,7 +36,7 @@ class IsAdminorIsModerorIsSuperUser(BasePermission):
         ):
             return True
         return (
-            obj.author == request.user
+            obj.author_id == request.user.id
         )
 
 
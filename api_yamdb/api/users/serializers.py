@@ -1,7 +1,9 @@
 from django.contrib.auth import get_user_model
 from django.contrib.auth.validators import UnicodeUsernameValidator
-from django.db import IntegrityError
+from django.db import IntegrityError, transaction
+from django.db.models import Q
 from rest_framework import serializers
+from rest_framework.settings import api_settings
 
 from users.validators import validate_username
 
@@ -18,17 +20,46 @@ class AuthSerializer(serializers.Serializer):
         validators=(validate_username, UnicodeUsernameValidator())
     )
 
-    def validate(self, data):
+    conflict_message = 'Одно из полей username или email уже занято'
+
+    def find_user(self, username, email):
+        '''
+        Пользователь с этими username и email или None.
+        Если занято только одно из полей - ошибка валидации
+        '''
+        # Поля уникальны, поэтому при полном совпадении строка одна.
+        user = User.objects.filter(
+            Q(username=username) | Q(email=email)
+        ).first()
+        if user is None or (
+            user.username == username and user.email == email
+        ):
+            return user
+        raise serializers.ValidationError(
+            {api_settings.NON_FIELD_ERRORS_KEY: [self.conflict_message]}
+        )
+
+    def create(self, validated_data):
+        '''
+        Новый или уже зарегистрированный пользователь: одно чтение
+        и не больше одной записи. Если параллельный запрос успел
+        создать пользователя раньше, результат берется у него
+        '''
+        username = validated_data['username']
+        email = validated_data['email']
+        user = self.find_user(username, email)
+        if user is not None:
+            return user
         try:
-            User.objects.get_or_create(
-                username=data.get('username'),
-                email=data.get('email')
-            )
+            with transaction.atomic():
+                return User.objects.create(username=username, email=email)
         except IntegrityError:
+            user = self.find_user(username, email)
+        if user is None:
             raise serializers.ValidationError(
-                'Одно из полей username или email уже занято'
+                {api_settings.NON_FIELD_ERRORS_KEY: [self.conflict_message]}
             )
-        return data
+        return user
 
 
 class TokenSerializer(serializers.Serializer):
@@ -0,0 +1,96 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.throttling import BaseThrottle
+
+THROTTLE_KEY = 'throttle:{scope}:{ident}:{window}'
+DURATIONS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def parse_rate(rate):
+    '''
+    '5/min' -> (5, 60)
+    '''
+    count, period = rate.split('/')
+    return int(count), DURATIONS[period[0]]
+
+
+class SlidingWindowThrottle(BaseThrottle):
+    '''
+    Ограничение частоты запросов скользящим окном. Счетчики текущего
+    и предыдущего окна хранятся в кэше throttle и увеличиваются атомарно
+    через cache.incr, поэтому лимит общий для всех процессов.
+    Лимит берется из настройки THROTTLE_RATES по scope
+    '''
+    scope = None
+
+    def get_ident_key(self, request, view):
+        '''
+        Кого ограничивать: строка или None, если запрос не учитывается
+        '''
+        raise NotImplementedError
+
+    def allow_request(self, request, view):
+        rate = settings.THROTTLE_RATES.get(self.scope)
+        ident = self.get_ident_key(request, view)
+        if rate is None or ident is None:
+            return True
+        self.limit, self.duration = parse_rate(rate)
+        cache = caches['throttle']
+        ident = hashlib.md5(ident.encode()).hexdigest()
+        window, elapsed = divmod(time.time(), self.duration)
+        key = THROTTLE_KEY.format(
+            scope=self.scope, ident=ident, window=int(window)
+        )
+        if cache.add(key, 1, self.duration * 2):
+            current = 1
+        else:
+            try:
+                current = cache.incr(key)
+            except ValueError:
+                cache.set(key, 1, self.duration * 2)
+                current = 1
+        previous = cache.get(THROTTLE_KEY.format(
+            scope=self.scope, ident=ident, window=int(window) - 1
+        ), 0)
+        self.remaining = self.duration - elapsed
+        weight = self.remaining / self.duration
+        return previous * weight + current <= self.limit
+
+    def wait(self):
+        return self.remaining
+
+
+class IPThrottle(SlidingWindowThrottle):
+    '''
+    Лимит по адресу клиента. X-Forwarded-For учитывается только
+    при заданном NUM_PROXIES, иначе берется REMOTE_ADDR
+    '''
+    def get_ident_key(self, request, view):
+        return self.get_ident(request)
+
+
+class UsernameThrottle(SlidingWindowThrottle):
+    def get_ident_key(self, request, view):
+        username = request.data.get('username')
+        if not isinstance(username, str) or not username:
+            return None
+        return username.lower()
+
+
+class SignupIPThrottle(IPThrottle):
+    scope = 'signup_ip'
+
+
+class SignupUsernameThrottle(UsernameThrottle):
+    scope = 'signup_username'
+
+
+class TokenIPThrottle(IPThrottle):
+    scope = 'token_ip'
+
+
+class TokenUsernameThrottle(UsernameThrottle):
+    scope = 'token_username'
@@ -1,52 +1,59 @@
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.contrib.auth.tokens import default_token_generator
-from django.core.mail import send_mail
 from django.shortcuts import get_object_or_404
+from django.utils.decorators import method_decorator
+from django.views.decorators.cache import never_cache
 from rest_framework import filters, permissions, status, viewsets
 from rest_framework.decorators import action
-from rest_framework.pagination import PageNumberPagination
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from rest_framework_simplejwt.tokens import AccessToken
 from rest_framework_simplejwt.views import TokenObtainPairView
 
+from api.reviews.pagination import CachedCountPagination
+from api.users.authentication import access_token_for
 from api.users.permissions import (IsAdminOnly)
 from api.users.serializers import (AuthSerializer,
                                    TokenSerializer,
                                    UserSerializer)
+from api.users.throttling import (SignupIPThrottle,
+                                  SignupUsernameThrottle,
+                                  TokenIPThrottle,
+                                  TokenUsernameThrottle)
+from users.outbox import enqueue_mail
 
 User = get_user_model()
 
 
+@method_decorator(never_cache, name='dispatch')
 class UserSignupView(APIView):
     '''
     Регистрация нового пользователя
     '''
     permission_classes = (permissions.AllowAny,)
+    throttle_classes = (SignupIPThrottle, SignupUsernameThrottle)
 
     def post(self, request):
         serializer = AuthSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        user = User.objects.get(
-            username=request.data.get('username'),
-            email=request.data.get('email')
-        )
+        user = serializer.save()
         confirmation_code = default_token_generator.make_token(user)
-        send_mail(
+        enqueue_mail(
             'Код подтверждения',
             f'Ваш код - {confirmation_code}',
             settings.SENDER_EMAIL,
-            [request.data.get('email')]
+            [user.email]
         )
         return Response(serializer.data, status=status.HTTP_200_OK)
 
 
+@method_decorator(never_cache, name='dispatch')
 class ObtainTokenView(TokenObtainPairView):
     '''
     Получение токена
     '''
     permission_classes = (permissions.AllowAny,)
+    throttle_classes = (TokenIPThrottle, TokenUsernameThrottle)
 
     def post(self, request):
         serializer = TokenSerializer(data=request.data)
@@ -61,10 +68,11 @@ class ObtainTokenView(TokenObtainPairView):
                 'Неверный confirmation_code',
                 status=status.HTTP_400_BAD_REQUEST
             )
-        token = {'token': str(AccessToken.for_user(user))}
+        token = {'token': str(access_token_for(user))}
         return Response(token, status=status.HTTP_200_OK)
 
 
+@method_decorator(never_cache, name='dispatch')
 class UserViewSet(viewsets.ModelViewSet):
     '''
     Работа с пользователями
@@ -75,7 +83,7 @@ class UserViewSet(viewsets.ModelViewSet):
     lookup_field = 'username'
     filter_backends = (filters.SearchFilter,)
     search_fields = ('=username',)
-    pagination_class = PageNumberPagination
+    pagination_class = CachedCountPagination
     http_method_names = ['get', 'delete', 'post', 'patch']
 
     @action(
@@ -84,7 +92,7 @@ class UserViewSet(viewsets.ModelViewSet):
     )
     def get_update_me(self, request):
         serializer = self.get_serializer(
-            request.user,
+            get_object_or_404(User, pk=request.user.pk),
             data=request.data,
             partial=True
         )
@@ -98,7 +106,7 @@ class UserViewSet(viewsets.ModelViewSet):
     @get_update_me.mapping.patch
     def patch_me(self, request):
         serializer = self.get_serializer(
-            request.user,
+            get_object_or_404(User, pk=request.user.pk),
             data=request.data,
             partial=True
         )
@@ -35,6 +35,7 @@ MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
+    'api.middleware.RequestCoalescingMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
@@ -69,6 +70,9 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # Тестовая база в файле: в общей базе в памяти параллельные
+        # запросы получают ошибку блокировки таблицы, а не ждут ее.
+        'TEST': {'NAME': BASE_DIR / 'test_db.sqlite3'},
     }
 }
 
@@ -124,15 +128,18 @@ REST_FRAMEWORK = {
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 REST_FRAMEWORK = {
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    'DEFAULT_PAGINATION_CLASS': 'api.reviews.pagination.CachedCountPagination',
     'PAGE_SIZE': 5,
     'DEFAULT_FILTER_BACKENDS': ['django_filters.rest_framework.DjangoFilterBackend'],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticatedOrReadOnly',
     ],
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api.users.authentication.ClaimsJWTAuthentication',
     ],
+    # Число доверенных прокси перед сервером: адрес клиента берется
+    # из X-Forwarded-For только за ними, при 0 - из REMOTE_ADDR
+    'NUM_PROXIES': 0,
 }
 
 SIMPLE_JWT = {
@@ -140,6 +147,115 @@ SIMPLE_JWT = {
     'AUTH_HEADER_TYPES': ('Bearer',),
 }
 
+# Как часто сверять роль и флаги из токена с базой, в секундах:
+# None - доверять токену, 0 - сверять на каждом запросе
+JWT_CLAIMS_REVALIDATE_INTERVAL = 60
+
 AUTH_USER_MODEL = "users.Users"
 
+# Кэш общий для всех процессов сервера: в нем хранятся версии моделей,
+# по которым сбрасываются закэшированные ответы, блокировки пересчета
+# и счетчики лимитов. Кэш в памяти процесса годится только для тестов.
+# Если memcached недоступен, ошибки кэша не пробрасываются: API отвечает
+# без кэширования, а лимиты запросов не применяются.
+MEMCACHED_LOCATION = '127.0.0.1:11211'
+MEMCACHED_OPTIONS = {
+    'connect_timeout': 1,
+    'timeout': 1,
+    'ignore_exc': True,
+}
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.memcached.PyMemcacheCache',
+        'LOCATION': MEMCACHED_LOCATION,
+        'OPTIONS': MEMCACHED_OPTIONS,
+    },
+    'throttle': {
+        'BACKEND': 'django.core.cache.backends.memcached.PyMemcacheCache',
+        'LOCATION': MEMCACHED_LOCATION,
+        'KEY_PREFIX': 'throttle',
+        'OPTIONS': MEMCACHED_OPTIONS,
+    },
+}
+
+# Лимиты запросов к регистрации и получению токена с одного IP
+# и для одного username; счетчики хранятся в кэше throttle
+THROTTLE_RATES = {
+    'signup_ip': '100/hour',
+    'signup_username': '10/hour',
+    'token_ip': '100/hour',
+    'token_username': '20/hour',
+}
+
+# Время жизни закэшированного COUNT(*) в пагинации, в секундах
+PAGINATION_COUNT_CACHE_TIMEOUT = 60
+# С какого размера таблицы без фильтров вместо COUNT(*) берется оценка;
+# None - всегда считать точно
+PAGINATION_COUNT_ESTIMATE_THRESHOLD = None
+# Время жизни закэшированных списков категорий и жанров, в секундах
+LIST_CACHE_TIMEOUT = 300
+# Сколько секунд после истечения отдавать устаревшее значение,
+# пока один из запросов пересчитывает его
+CACHE_STALE_TIMEOUT = 30
+# Время жизни блокировки пересчета значения кэша, в секундах
+CACHE_LOCK_TIMEOUT = 10
+# Сколько ждать пересчитанное другим запросом значение, в секундах
+CACHE_LOCK_WAIT = 5
+CACHE_LOCK_POLL_INTERVAL = 0.05
+# max-age и stale-while-revalidate в секундах для анонимных GET-запросов
+# по basename вьюсета
+CACHE_CONTROL = {
+    'default': (30, 30),
+    'categories': (300, 600),
+    'genres': (300, 600),
+    'titles': (60, 120),
+    'reviews': (30, 60),
+    'comments': (30, 60),
+}
+# Объединять одновременные одинаковые GET-запросы внутри процесса
+REQUEST_COALESCING = False
+# Сколько секунд ждать ответ первого из одинаковых запросов
+REQUEST_COALESCING_TIMEOUT = 10
+# Через сколько запросов писать в лог счетчики объединения;
+# None - не писать
+REQUEST_COALESCING_LOG_INTERVAL = 1000
+# Фильтровать список произведений по снимку каталога в памяти процесса
+CATALOG_SNAPSHOT = False
+# Как часто проверять изменения каталога, даже если версии моделей
+# в кэше не менялись, и как часто перечитывать его полностью, в секундах
+CATALOG_SNAPSHOT_REFRESH_INTERVAL = 5
+CATALOG_SNAPSHOT_RELOAD_INTERVAL = 300
+# Сколько соответствий slug -> id жанров и категорий держать в памяти
+SLUG_RESOLVER_CACHE_SIZE = 1024
+# Время жизни сериализованных произведений в кэше, в секундах
+TITLE_FRAGMENT_CACHE_TIMEOUT = 3600
+
 SENDER_EMAIL = 'from@example.com'
+
+# Очередь писем: размер пачки, число попыток, задержка перед первым
+# повтором (дальше удваивается) и на сколько письмо резервируется
+# за обработчиком, в секундах
+EMAIL_OUTBOX_BATCH_SIZE = 100
+EMAIL_OUTBOX_MAX_ATTEMPTS = 5
+EMAIL_OUTBOX_RETRY_DELAY = 60
+EMAIL_OUTBOX_LEASE = 300
+
+# Вес априорной средней оценки во взвешенном рейтинге произведений
+WEIGHTED_RATING_MIN_VOTES = 10
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'api': {
+            'handlers': ['console'],
+            'level': 'INFO',
+        },
+    },
+}
@@ -1,3 +1,7 @@
 NAME_LENGTH = 150
 SLUG_LENGTH = 50
 EMAIL_LENGTH = 254
+LEADERBOARD_SIZE = 10
+MIN_SCORE = 1
+MAX_SCORE = 10
+SCORES = range(MIN_SCORE, MAX_SCORE + 1)
@@ -0,0 +1,105 @@
+from django.db import transaction
+
+from reviews.constants import LEADERBOARD_SIZE
+from reviews.models import Category, Genre, Leaderboard, Title
+
+
+def group_filter(field, group_id):
+    return {f'{field}_id': group_id}
+
+
+def top_titles(field, group_id):
+    '''
+    Лучшие произведения группы: по рейтингу, затем по числу оценок
+    '''
+    return Title.objects.filter(
+        **{f'{field}__id': group_id}, rating_count__gt=0
+    ).order_by(
+        '-rating', '-rating_count', 'pk'
+    ).values_list('pk', flat=True)[:LEADERBOARD_SIZE]
+
+
+def build_entries(field, group_id):
+    return [
+        Leaderboard(
+            **group_filter(field, group_id),
+            title_id=title_id,
+            position=position
+        )
+        for position, title_id in enumerate(top_titles(field, group_id), 1)
+    ]
+
+
+def refresh_group(field, group_id):
+    '''
+    Пересобирает топ одного жанра или категории
+    '''
+    entries = build_entries(field, group_id)
+    with transaction.atomic():
+        Leaderboard.objects.filter(**group_filter(field, group_id)).delete()
+        Leaderboard.objects.bulk_create(entries)
+
+
+def can_enter(field, group_id, score):
+    '''
+    Может ли произведение с такой оценкой попасть в топ группы
+    '''
+    scores = list(Leaderboard.objects.filter(
+        **group_filter(field, group_id)
+    ).values_list('title__rating', 'title__rating_count'))
+    return len(scores) < LEADERBOARD_SIZE or score >= min(scores)
+
+
+def placed_groups(title_id):
+    '''
+    Топы, в которых сейчас стоит произведение
+    '''
+    return {
+        ('genre', genre_id) if genre_id else ('category', category_id)
+        for genre_id, category_id in Leaderboard.objects.filter(
+            title_id=title_id
+        ).values_list('genre_id', 'category_id')
+    }
+
+
+def refresh_for_title(title_id, groups=()):
+    '''
+    Обновляет только те топы, на которые могло повлиять изменение
+    произведения: где оно уже стоит и куда теперь может попасть
+    '''
+    placed = placed_groups(title_id)
+    groups = set(groups) | placed
+    title = Title.objects.filter(pk=title_id).values(
+        'category_id', 'rating', 'rating_count'
+    ).first()
+    if title and title['rating_count']:
+        candidates = {
+            ('genre', genre_id)
+            for genre_id in Title.genre.through.objects.filter(
+                title_id=title_id
+            ).values_list('genre_id', flat=True)
+        }
+        if title['category_id']:
+            candidates.add(('category', title['category_id']))
+        score = (title['rating'], title['rating_count'])
+        groups.update(
+            group for group in candidates - placed
+            if can_enter(*group, score)
+        )
+    for field, group_id in groups:
+        refresh_group(field, group_id)
+
+
+def rebuild_leaderboards():
+    '''
+    Полностью пересобирает топы всех жанров и категорий
+    '''
+    entries = []
+    for genre_id in Genre.objects.values_list('pk', flat=True):
+        entries += build_entries('genre', genre_id)
+    for category_id in Category.objects.values_list('pk', flat=True):
+        entries += build_entries('category', category_id)
+    with transaction.atomic():
+        Leaderboard.objects.all().delete()
+        Leaderboard.objects.bulk_create(entries, batch_size=1000)
+    return len(entries)
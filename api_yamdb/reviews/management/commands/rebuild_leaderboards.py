@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from reviews.leaderboards import rebuild_leaderboards
+
+
+class Command(BaseCommand):
+    '''
+    Пересборка топов жанров и категорий
+    '''
+    help = 'Пересобирает топ произведений каждого жанра и каждой категории.'
+
+    def handle(self, *args, **options):
+        count = rebuild_leaderboards()
+        self.stdout.write(self.style.SUCCESS(
+            f'Записано мест в топах: {count}'
+        ))
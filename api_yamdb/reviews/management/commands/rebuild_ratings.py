@@ -0,0 +1,91 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Count, F
+from django.utils import timezone
+
+from reviews.constants import SCORES
+from reviews.leaderboards import rebuild_leaderboards, refresh_for_title
+from reviews.models import Review, Title, score_count_field
+from reviews.ratings import title_weighted_rating
+
+BATCH_SIZE = 1000
+HISTOGRAM_FIELDS = tuple(score_count_field(score) for score in SCORES)
+RATING_FIELDS = ('rating_sum', 'rating_count', 'rating') + HISTOGRAM_FIELDS
+
+
+def expected_values(histogram):
+    '''
+    Значения полей рейтинга по гистограмме оценок произведения
+    '''
+    score_sum = sum(score * count for score, count in histogram.items())
+    score_count = sum(histogram.values())
+    rating = score_sum // score_count if score_count else 0
+    return (score_sum, score_count, rating) + tuple(
+        histogram.get(score, 0) for score in SCORES
+    )
+
+
+class Command(BaseCommand):
+    '''
+    Пересчет сохраненных рейтингов произведений по отзывам
+    '''
+    help = (
+        'Пересчитывает сумму, количество, гистограмму оценок, рейтинг '
+        'и взвешенный рейтинг произведений и обновляет затронутые топы. '
+        'С флагом --check только сообщает о расхождениях.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Только проверить рейтинги, ничего не изменяя',
+        )
+
+    def handle(self, *args, **options):
+        histograms = {}
+        for row in Review.objects.order_by().values(
+            'title_id', 'score'
+        ).annotate(score_count=Count('id')):
+            histograms.setdefault(row['title_id'], {})[row['score']] = (
+                row['score_count']
+            )
+        stale = []
+        titles = Title.objects.order_by('pk').only('pk', *RATING_FIELDS)
+        for title in titles.iterator():
+            values = expected_values(histograms.get(title.pk, {}))
+            if tuple(getattr(title, f) for f in RATING_FIELDS) != values:
+                for field, value in zip(RATING_FIELDS, values):
+                    setattr(title, field, value)
+                stale.append(title)
+        if options['check']:
+            if stale:
+                raise CommandError(
+                    f'Рейтинг расходится с отзывами у {len(stale)} '
+                    f'произведений: {", ".join(str(t.pk) for t in stale)}'
+                )
+            self.stdout.write(self.style.SUCCESS('Рейтинги в порядке'))
+            return
+        with transaction.atomic():
+            Title.objects.bulk_update(
+                stale, RATING_FIELDS, batch_size=BATCH_SIZE
+            )
+            # Дата изменения сбрасывает ETag и попадает в снимок каталога.
+            for start in range(0, len(stale), BATCH_SIZE):
+                Title.objects.filter(pk__in=[
+                    title.pk for title in stale[start:start + BATCH_SIZE]
+                ]).update(
+                    weighted_rating=title_weighted_rating(
+                        F('rating_sum'), F('rating_count')
+                    ),
+                    modified=timezone.now(),
+                    version=F('version') + 1,
+                )
+            if len(stale) >= BATCH_SIZE:
+                rebuild_leaderboards()
+            else:
+                for title in stale:
+                    refresh_for_title(title.pk)
+        self.stdout.write(self.style.SUCCESS(
+            f'Обновлено произведений: {len(stale)}'
+        ))
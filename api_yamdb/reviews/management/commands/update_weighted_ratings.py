@@ -0,0 +1,34 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from reviews.ratings import update_weighted_ratings
+
+
+class Command(BaseCommand):
+    '''
+    Пересчет взвешенного рейтинга произведений
+    '''
+    help = (
+        'Пересчитывает среднюю оценку и байесовский рейтинг всех '
+        'произведений по суммам и количеству оценок. Между запусками '
+        'новые оценки учитываются сразу, но по прежней средней, поэтому '
+        'команду стоит запускать периодически, например раз в час.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--min-votes',
+            type=int,
+            default=settings.WEIGHTED_RATING_MIN_VOTES,
+            help='Вес априорной средней оценки',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            updated, mean = update_weighted_ratings(options['min_votes'])
+        except ValueError as error:
+            raise CommandError(error)
+        self.stdout.write(self.style.SUCCESS(
+            f'Обновлено произведений: {updated}, '
+            f'средняя оценка: {mean:.2f}'
+        ))
@@ -1,13 +1,24 @@
 from django.core.validators import MaxValueValidator, MinValueValidator
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F
+from django.db.models.functions import Coalesce, NullIf
 from django.utils import timezone
 
 from users.models import Users
-from reviews.constants import NAME_LENGTH, SLUG_LENGTH
+from reviews.constants import (
+    MAX_SCORE, MIN_SCORE, NAME_LENGTH, SCORES, SLUG_LENGTH
+)
 
 User = Users
 
 
+def score_count_field(score):
+    '''
+    Имя поля произведения со счетчиком оценок score
+    '''
+    return f'score_{score}_count'
+
+
 class Category(models.Model):
     '''
     Категории
@@ -75,16 +86,100 @@ class Title(models.Model):
         validators=[MaxValueValidator(timezone.now().year)]
     )
     description = models.TextField("Описание произведения")
+    rating_sum = models.PositiveIntegerField(
+        'Сумма оценок', default=0, editable=False
+    )
+    rating_count = models.PositiveIntegerField(
+        'Количество оценок', default=0, editable=False
+    )
+    rating = models.PositiveSmallIntegerField(
+        'Рейтинг', default=0, editable=False
+    )
+    weighted_rating = models.FloatField(
+        'Взвешенный рейтинг', default=0, editable=False
+    )
+    modified = models.DateTimeField('Дата изменения', auto_now=True)
+    version = models.PositiveIntegerField(
+        'Версия отзывов и комментариев', default=0, editable=False
+    )
 
     class Meta:
         ordering = ['name']
         verbose_name = 'Произведение'
         verbose_name_plural = 'Произведения'
         default_related_name = 'title'
+        indexes = [
+            models.Index(fields=['rating', 'id']),
+            models.Index(fields=['year', 'id']),
+            models.Index(fields=['rating_count', 'id']),
+            models.Index(fields=['name', 'id']),
+            models.Index(fields=['weighted_rating', 'id']),
+            models.Index(fields=['category', 'rating', 'id']),
+            models.Index(fields=['category', 'year', 'id']),
+            models.Index(fields=['category', 'rating_count', 'id']),
+            models.Index(fields=['category', 'name', 'id']),
+            models.Index(fields=['category', 'weighted_rating', 'id']),
+        ]
 
     def __str__(self):
         return self.name
 
+    @property
+    def score_histogram(self):
+        return {
+            score: getattr(self, score_count_field(score)) for score in SCORES
+        }
+
+    @classmethod
+    def bump_versions(cls, title_ids):
+        '''
+        Увеличивает счетчик версий произведений после записи отзывов
+        или комментариев к ним, в том числе массовой
+        '''
+        cls.objects.filter(pk__in=title_ids).update(version=F('version') + 1)
+
+    @classmethod
+    def update_rating(cls, title_id, added=None, removed=None):
+        '''
+        Атомарно учитывает добавленную и убирает удаленную оценку:
+        сдвигает сумму, количество и гистограмму оценок произведения,
+        пересчитывает по ним рейтинг и взвешенный рейтинг, увеличивает
+        версию произведения и обновляет затронутые топы
+        '''
+        from reviews.leaderboards import refresh_for_title
+        from reviews.ratings import title_weighted_rating
+
+        rating_sum = F('rating_sum') + (added or 0) - (removed or 0)
+        rating_count = F('rating_count') + (
+            (added is not None) - (removed is not None)
+        )
+        histogram = {}
+        if added is not None:
+            field = score_count_field(added)
+            histogram[field] = F(field) + 1
+        if removed is not None:
+            field = score_count_field(removed)
+            histogram[field] = F(field) - 1
+        cls.objects.filter(pk=title_id).update(
+            rating_sum=rating_sum,
+            rating_count=rating_count,
+            rating=Coalesce(rating_sum / NullIf(rating_count, 0), 0),
+            weighted_rating=title_weighted_rating(rating_sum, rating_count),
+            modified=timezone.now(),
+            version=F('version') + 1,
+            **histogram
+        )
+        refresh_for_title(title_id)
+
+
+for score in SCORES:
+    Title.add_to_class(
+        score_count_field(score),
+        models.PositiveIntegerField(
+            f'Количество оценок {score}', default=0, editable=False
+        )
+    )
+
 
 class Review(models.Model):
     '''
@@ -104,9 +199,12 @@ class Review(models.Model):
     text = models.TextField('Текст отзыва')
     score = models.PositiveSmallIntegerField(
         'Оценка',
-        validators=[MinValueValidator(1), MaxValueValidator(10)]
+        validators=[
+            MinValueValidator(MIN_SCORE), MaxValueValidator(MAX_SCORE)
+        ]
     )
     pub_date = models.DateTimeField('Дата публикации', auto_now_add=True)
+    modified = models.DateTimeField('Дата изменения', auto_now=True)
 
     class Meta:
         constraints = (models.UniqueConstraint(
@@ -121,6 +219,39 @@ class Review(models.Model):
     def __str__(self):
         return (self.text)[:15]
 
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            if self._state.adding:
+                super().save(*args, **kwargs)
+                Title.update_rating(self.title_id, added=self.score)
+            elif self.score == self._loaded_score:
+                # Оценка не менялась: она не перезаписывается, чтобы
+                # не затереть параллельную переоценку.
+                kwargs['update_fields'] = [
+                    field for field in kwargs.get('update_fields') or [
+                        field.name for field in self._meta.concrete_fields
+                        if not field.primary_key
+                    ]
+                    if field != 'score'
+                ]
+                super().save(*args, **kwargs)
+                Title.bump_versions([self.title_id])
+            else:
+                # Прежняя оценка перечитывается под блокировкой строки:
+                # параллельная переоценка дождется ее и вычтет уже новую.
+                previous_score = Review.objects.select_for_update().filter(
+                    pk=self.pk
+                ).values_list('score', flat=True).first()
+                super().save(*args, **kwargs)
+                if previous_score != self.score:
+                    Title.update_rating(
+                        self.title_id, added=self.score,
+                        removed=previous_score
+                    )
+                else:
+                    Title.bump_versions([self.title_id])
+        self._loaded_score = self.score
+
 
 class Comment(models.Model):
     '''
@@ -138,6 +269,7 @@ class Comment(models.Model):
     )
     text = models.TextField('Комментарий')
     pub_date = models.DateTimeField('Дата публикации', auto_now_add=True)
+    modified = models.DateTimeField('Дата изменения', auto_now=True)
 
     class Meta:
         default_related_name = 'comments'
@@ -147,3 +279,49 @@ class Comment(models.Model):
 
     def __str__(self):
         return (self.text)
+
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            Title.bump_versions(
+                Review.objects.filter(pk=self.review_id).values('title_id')
+            )
+
+
+class Leaderboard(models.Model):
+    '''
+    Места произведений в топе жанра или категории
+    '''
+    genre = models.ForeignKey(
+        Genre,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        verbose_name='Жанр'
+    )
+    category = models.ForeignKey(
+        Category,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        verbose_name='Категория'
+    )
+    title = models.ForeignKey(
+        Title,
+        on_delete=models.CASCADE,
+        verbose_name='Произведение'
+    )
+    position = models.PositiveSmallIntegerField('Место')
+
+    class Meta:
+        default_related_name = 'leaderboard_entries'
+        ordering = ['position']
+        verbose_name = 'Место в топе'
+        verbose_name_plural = 'Топ произведений'
+        indexes = [
+            models.Index(fields=['genre', 'position']),
+            models.Index(fields=['category', 'position']),
+        ]
+
+    def __str__(self):
+        return f'{self.position}. {self.title_id}'
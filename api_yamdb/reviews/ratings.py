@@ -0,0 +1,75 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F, FloatField, Sum
+from django.db.models.functions import Cast
+
+from reviews.models import Title
+
+RATING_PRIOR_KEY = 'rating-prior'
+
+
+def weighted_rating(min_votes, mean, rating_sum=None, rating_count=None):
+    '''
+    Выражение байесовского рейтинга:
+    (сумма оценок + m * C) / (число оценок + m), где C - средняя оценка
+    по всем произведениям, а m - вес этой априорной оценки.
+    По умолчанию берутся текущие сумма и число оценок произведения
+    '''
+    if rating_sum is None:
+        rating_sum = F('rating_sum')
+    if rating_count is None:
+        rating_count = F('rating_count')
+    return (
+        Cast(rating_sum, FloatField()) + min_votes * mean
+    ) / (rating_count + min_votes)
+
+
+def compute_rating_prior(min_votes):
+    '''
+    Считает среднюю оценку по всем произведениям и запоминает ее
+    в кэше вместе с весом min_votes
+    '''
+    totals = Title.objects.aggregate(
+        score_sum=Sum('rating_sum'), score_count=Sum('rating_count')
+    )
+    mean = (
+        totals['score_sum'] / totals['score_count']
+        if totals['score_count'] else 0
+    )
+    cache.set(RATING_PRIOR_KEY, (mean, min_votes), None)
+    return mean, min_votes
+
+
+def rating_prior():
+    '''
+    Средняя оценка и ее вес на момент последнего полного пересчета;
+    если их нет в кэше, средняя считается заново с весом из настроек
+    '''
+    prior = cache.get(RATING_PRIOR_KEY)
+    if prior is None:
+        prior = compute_rating_prior(settings.WEIGHTED_RATING_MIN_VOTES)
+    return prior
+
+
+def title_weighted_rating(rating_sum, rating_count):
+    '''
+    Взвешенный рейтинг одного произведения с теми же средней и весом,
+    что при последнем пересчете: с ним новые и переоцененные
+    произведения не ждут полного пересчета
+    '''
+    mean, min_votes = rating_prior()
+    return weighted_rating(min_votes, mean, rating_sum, rating_count)
+
+
+def update_weighted_ratings(min_votes):
+    '''
+    Пересчитывает среднюю оценку и байесовский рейтинг всех
+    произведений одним UPDATE
+    '''
+    if min_votes <= 0:
+        raise ValueError('Вес априорной оценки должен быть положительным')
+    mean, _ = compute_rating_prior(min_votes)
+    updated = Title.objects.update(
+        weighted_rating=weighted_rating(min_votes, mean)
+    )
+    return updated, mean
@@ -0,0 +1,123 @@
+import re
+
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connections
+from django.db.models import F, FloatField, Func, Q
+from django.db.models.expressions import RawSQL
+
+from reviews.models import Title
+
+TITLE_TABLE = Title._meta.db_table
+SEARCH_TABLE = f'{TITLE_TABLE}_fts'
+
+WORD_RE = re.compile(r'[^\W_]+')
+
+_search_index_aliases = set()
+
+SEARCH_INDEX_SQL = (
+    f"CREATE VIRTUAL TABLE {SEARCH_TABLE} USING fts5("
+    f"name, description, content='{TITLE_TABLE}', content_rowid='id', "
+    f"tokenize='unicode61 remove_diacritics 2')",
+    f"CREATE TRIGGER {SEARCH_TABLE}_ai AFTER INSERT ON {TITLE_TABLE} BEGIN "
+    f"INSERT INTO {SEARCH_TABLE}(rowid, name, description) "
+    f"VALUES (new.id, new.name, new.description); END",
+    f"CREATE TRIGGER {SEARCH_TABLE}_ad AFTER DELETE ON {TITLE_TABLE} BEGIN "
+    f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}, rowid, name, description) "
+    f"VALUES ('delete', old.id, old.name, old.description); END",
+    f"CREATE TRIGGER {SEARCH_TABLE}_au AFTER UPDATE OF name, description "
+    f"ON {TITLE_TABLE} BEGIN "
+    f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}, rowid, name, description) "
+    f"VALUES ('delete', old.id, old.name, old.description); "
+    f"INSERT INTO {SEARCH_TABLE}(rowid, name, description) "
+    f"VALUES (new.id, new.name, new.description); END",
+    f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}) VALUES ('rebuild')",
+)
+
+
+def search_index_exists(using=DEFAULT_DB_ALIAS):
+    '''
+    Проверяет, что для базы создан полнотекстовый индекс произведений
+    '''
+    if using in _search_index_aliases:
+        return True
+    connection = connections[using]
+    if connection.vendor != 'sqlite':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s",
+            (SEARCH_TABLE,)
+        )
+        exists = cursor.fetchone() is not None
+    if exists:
+        _search_index_aliases.add(using)
+    return exists
+
+
+def create_search_index(using=DEFAULT_DB_ALIAS, **kwargs):
+    '''
+    Создает FTS5-таблицу по названию и описанию произведений
+    вместе с триггерами, которые поддерживают ее в актуальном состоянии
+    '''
+    if connections[using].vendor != 'sqlite' or search_index_exists(using):
+        return
+    try:
+        with connections[using].cursor() as cursor:
+            for statement in SEARCH_INDEX_SQL:
+                cursor.execute(statement)
+    except OperationalError:
+        # SQLite собран без FTS5: поиск работает через icontains.
+        return
+    _search_index_aliases.add(using)
+
+
+class SearchRank(Func):
+    '''
+    Релевантность произведения по запросу MATCH. Строка индекса
+    ищется по rowid колонки pk внешнего запроса, поэтому выражение
+    работает и с переименованной таблицей во вложенном запросе
+    '''
+    output_field = FloatField()
+
+    def __init__(self, query, pk=F('pk')):
+        super().__init__(pk)
+        self.query = query
+
+    def as_sql(self, compiler, connection, **extra_context):
+        pk_sql, params = compiler.compile(self.source_expressions[0])
+        return (
+            f'(SELECT rank FROM {SEARCH_TABLE} '
+            f'WHERE {SEARCH_TABLE} MATCH %s AND rowid = {pk_sql})',
+            [self.query, *params]
+        )
+
+
+def build_match_query(value):
+    '''
+    Превращает пользовательский ввод в безопасный запрос MATCH:
+    каждое слово ищется как префикс. Слова выделяются так же, как
+    токенайзером unicode61, поэтому ввод из одних знаков препинания
+    дает пустой запрос
+    '''
+    return ' '.join(f'"{term}"*' for term in WORD_RE.findall(value))
+
+
+def search_titles(queryset, value):
+    '''
+    Фильтрует произведения по полнотекстовому запросу
+    и сортирует их по релевантности
+    '''
+    if not search_index_exists(queryset.db):
+        return queryset.filter(
+            Q(name__icontains=value) | Q(description__icontains=value)
+        )
+    query = build_match_query(value)
+    if not query:
+        return queryset.none()
+    # MATCH для фильтра выполняется один раз, а rank ищется в индексе
+    # по rowid для каждой найденной строки.
+    return queryset.filter(pk__in=RawSQL(
+        f'SELECT rowid FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s',
+        [query]
+    )).annotate(
+        search_rank=SearchRank(query)
+    ).order_by('search_rank', 'pk')
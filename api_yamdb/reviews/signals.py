@@ -0,0 +1,116 @@
+import threading
+
+from django.db.models.signals import (
+    m2m_changed, post_delete, post_init, post_save, pre_delete, pre_save
+)
+from django.dispatch import receiver
+from django.utils import timezone
+
+from reviews.leaderboards import (
+    placed_groups, refresh_for_title, refresh_group
+)
+from reviews.models import Comment, Review, Title
+from reviews.ratings import rating_prior
+
+
+class DeletingTitles(threading.local):
+    '''
+    Произведения, которые удаляются в текущем потоке: их отзывы
+    удаляются каскадом раньше самого произведения
+    '''
+    def __init__(self):
+        self.ids = set()
+
+
+deleting_titles = DeletingTitles()
+
+
+@receiver(post_init, sender=Review)
+def remember_review_score(sender, instance, **kwargs):
+    '''
+    Запоминает оценку, с которой отзыв был загружен
+    '''
+    instance._loaded_score = instance.__dict__.get('score')
+
+
+@receiver(pre_delete, sender=Review)
+def lock_deleted_review(sender, instance, **kwargs):
+    '''
+    Блокирует строку удаляемого отзыва и перечитывает его оценку.
+    Параллельное удаление того же отзыва дождется блокировки,
+    не найдет строку и не вычтет оценку второй раз
+    '''
+    instance._deleted_score = Review.objects.select_for_update().filter(
+        pk=instance.pk
+    ).values_list('score', flat=True).first()
+
+
+@receiver(post_delete, sender=Review)
+def subtract_review_score(sender, instance, **kwargs):
+    '''
+    Убирает оценку удаленного отзыва из рейтинга произведения.
+    При удалении самого произведения рейтинг и топы не пересчитываются
+    '''
+    score = getattr(instance, '_deleted_score', None)
+    if score is None or instance.title_id in deleting_titles.ids:
+        return
+    Title.update_rating(instance.title_id, removed=score)
+
+
+@receiver(post_delete, sender=Comment)
+def touch_commented_review(sender, instance, **kwargs):
+    '''
+    Отмечает изменение списка комментариев в отзыве,
+    чтобы удаление было видно по дате изменения и версии произведения
+    '''
+    reviews = Review.objects.filter(pk=instance.review_id)
+    reviews.update(modified=timezone.now())
+    Title.bump_versions(reviews.values('title_id'))
+
+
+@receiver(pre_save, sender=Title)
+def set_new_title_weighted_rating(sender, instance, **kwargs):
+    '''
+    Новое произведение без оценок получает взвешенный рейтинг,
+    равный средней оценке, как при полном пересчете
+    '''
+    if instance._state.adding and not instance.rating_count:
+        instance.weighted_rating, _ = rating_prior()
+
+
+@receiver(post_save, sender=Title)
+def refresh_title_leaderboards(sender, instance, created, **kwargs):
+    '''
+    Обновляет топы после смены категории произведения
+    '''
+    if not created:
+        refresh_for_title(instance.pk)
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def refresh_genre_leaderboards(sender, instance, action, reverse, **kwargs):
+    '''
+    Обновляет топы после изменения жанров произведения
+    '''
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if reverse:
+        refresh_group('genre', instance.pk)
+    else:
+        refresh_for_title(instance.pk)
+
+
+@receiver(pre_delete, sender=Title)
+def remember_title_leaderboards(sender, instance, **kwargs):
+    deleting_titles.ids.add(instance.pk)
+    instance._leaderboard_groups = placed_groups(instance.pk)
+
+
+@receiver(post_delete, sender=Title)
+def refresh_deleted_title_leaderboards(sender, instance, **kwargs):
+    '''
+    Заполняет освободившиеся места в топах удаленного произведения
+    '''
+    deleting_titles.ids.discard(instance.pk)
+    for field, group_id in getattr(instance, '_leaderboard_groups', ()):
+        refresh_group(field, group_id)
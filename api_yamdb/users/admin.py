@@ -1,7 +1,7 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
 
-from users.models import Users
+from users.models import OutgoingEmail, Users
 
 
 @admin.register(Users)
@@ -18,3 +18,13 @@ class UsersAdmin(UserAdmin):
         'is_staff',
         'is_active',
     )
+
+
+@admin.register(OutgoingEmail)
+class OutgoingEmailAdmin(admin.ModelAdmin):
+    '''
+    Админка очереди писем
+    '''
+    list_display = ('recipient', 'subject', 'created', 'attempts', 'sent',)
+    list_filter = ('sent',)
+    search_fields = ('recipient',)
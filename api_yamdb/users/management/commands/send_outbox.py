@@ -0,0 +1,46 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from users.outbox import send_outbox
+
+
+class Command(BaseCommand):
+    '''
+    Отправка писем из очереди
+    '''
+    help = (
+        'Отправляет письма из очереди пачками через одно соединение '
+        'с почтовым сервером. С флагом --watch работает постоянно.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=settings.EMAIL_OUTBOX_BATCH_SIZE,
+            help='Сколько писем забирать из очереди за раз',
+        )
+        parser.add_argument(
+            '--watch',
+            action='store_true',
+            help='Проверять очередь каждые --interval секунд',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=1.0,
+            help='Пауза между проверками очереди в режиме --watch',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            sent, failed = send_outbox(options['batch_size'])
+            if sent or failed or not options['watch']:
+                self.stdout.write(self.style.SUCCESS(
+                    f'Отправлено писем: {sent}, с ошибкой: {failed}'
+                ))
+            if not options['watch']:
+                return
+            time.sleep(options['interval'])
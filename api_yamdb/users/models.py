@@ -1,19 +1,34 @@
 from django.contrib.auth.models import AbstractUser
 from django.contrib.auth.validators import UnicodeUsernameValidator
 from django.db import models
+from django.utils import timezone
 
 from users.validators import validate_username
 from reviews.constants import SLUG_LENGTH, EMAIL_LENGTH
 
 
-class Users(AbstractUser):
+class UserRoleMixin:
     '''
-    Пользователи
+    Роли пользователя. Общие для модели и пользователя из токена
     '''
     USER = 'user'
     MODERATOR = 'moderator'
     ADMIN = 'admin'
     ROLE_CHOICES = ((USER, 'user'), (MODERATOR, 'moderator'), (ADMIN, 'admin'))
+
+    @property
+    def is_moderator(self):
+        return self.is_staff or self.role == self.MODERATOR
+
+    @property
+    def is_admin(self):
+        return self.is_superuser or self.role == self.ADMIN
+
+
+class Users(UserRoleMixin, AbstractUser):
+    '''
+    Пользователи
+    '''
     username = models.CharField(
         'Логин',
         max_length=SLUG_LENGTH,
@@ -28,8 +43,8 @@ class Users(AbstractUser):
     role = models.CharField(
         'Роль',
         max_length=SLUG_LENGTH,
-        choices=ROLE_CHOICES,
-        default=USER,
+        choices=UserRoleMixin.ROLE_CHOICES,
+        default=UserRoleMixin.USER,
     )
     bio = models.TextField(
         'Биография',
@@ -41,13 +56,35 @@ class Users(AbstractUser):
         verbose_name = 'Пользователь'
         verbose_name_plural = 'Пользователи'
 
-    @property
-    def is_moderator(self):
-        return self.is_staff or self.role == self.MODERATOR
+    def __str__(self):
+        return self.username
 
-    @property
-    def is_admin(self):
-        return self.is_superuser or self.role == self.ADMIN
+
+class OutgoingEmail(models.Model):
+    '''
+    Письмо в очереди на отправку
+    '''
+    subject = models.CharField('Тема', max_length=255)
+    body = models.TextField('Текст')
+    from_email = models.EmailField('Отправитель', max_length=EMAIL_LENGTH)
+    recipient = models.EmailField('Получатель', max_length=EMAIL_LENGTH)
+    created = models.DateTimeField('Дата создания', auto_now_add=True)
+    attempts = models.PositiveSmallIntegerField(
+        'Попыток отправки', default=0
+    )
+    next_attempt = models.DateTimeField(
+        'Следующая попытка', default=timezone.now
+    )
+    sent = models.DateTimeField('Дата отправки', null=True, blank=True)
+    error = models.TextField('Последняя ошибка', blank=True)
+
+    class Meta:
+        ordering = ['pk']
+        verbose_name = 'Исходящее письмо'
+        verbose_name_plural = 'Исходящие письма'
+        indexes = [
+            models.Index(fields=['sent', 'next_attempt']),
+        ]
 
     def __str__(self):
-        return self.username
+        return f'{self.recipient}: {self.subject}'
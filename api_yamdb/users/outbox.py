@@ -0,0 +1,85 @@
+from datetime import timedelta
+from smtplib import SMTPException
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.utils import timezone
+
+from users.models import OutgoingEmail
+
+
+def enqueue_mail(subject, body, from_email, recipient_list):
+    '''
+    Ставит письмо в очередь вместо отправки во время запроса
+    '''
+    OutgoingEmail.objects.bulk_create(
+        OutgoingEmail(
+            subject=subject, body=body, from_email=from_email,
+            recipient=recipient,
+        )
+        for recipient in recipient_list
+    )
+
+
+def claim_batch(batch_size, max_attempts):
+    '''
+    Забирает пачку готовых к отправке писем. Следующая попытка
+    откладывается на время отправки, поэтому параллельный
+    обработчик не возьмет те же письма
+    '''
+    now = timezone.now()
+    with transaction.atomic():
+        batch = list(OutgoingEmail.objects.select_for_update(
+            skip_locked=True
+        ).filter(
+            sent__isnull=True,
+            attempts__lt=max_attempts,
+            next_attempt__lte=now,
+        )[:batch_size])
+        OutgoingEmail.objects.filter(pk__in=[e.pk for e in batch]).update(
+            next_attempt=now + timedelta(
+                seconds=settings.EMAIL_OUTBOX_LEASE
+            )
+        )
+    return batch
+
+
+def send_outbox(batch_size=None, max_attempts=None, connection=None):
+    '''
+    Отправляет очередь пачками через одно соединение с почтовым
+    сервером. Неудачная отправка повторяется с экспоненциально
+    растущей задержкой, пока не кончатся попытки.
+    Возвращает число отправленных и неотправленных писем
+    '''
+    batch_size = batch_size or settings.EMAIL_OUTBOX_BATCH_SIZE
+    max_attempts = max_attempts or settings.EMAIL_OUTBOX_MAX_ATTEMPTS
+    sent = failed = 0
+    connection = connection or get_connection()
+    with connection:
+        while True:
+            batch = claim_batch(batch_size, max_attempts)
+            if not batch:
+                return sent, failed
+            for email in batch:
+                message = EmailMessage(
+                    email.subject, email.body, email.from_email,
+                    [email.recipient], connection=connection,
+                )
+                email.attempts += 1
+                try:
+                    message.send()
+                except (SMTPException, OSError) as error:
+                    email.error = repr(error)
+                    email.next_attempt = timezone.now() + timedelta(
+                        seconds=settings.EMAIL_OUTBOX_RETRY_DELAY
+                        * 2 ** (email.attempts - 1)
+                    )
+                    failed += 1
+                else:
+                    email.sent = timezone.now()
+                    email.error = ''
+                    sent += 1
+            OutgoingEmail.objects.bulk_update(
+                batch, ('attempts', 'next_attempt', 'sent', 'error')
+            )
@@ -1,6 +1,9 @@
 import os
 import sys
 
+import pytest
+from django.core.cache import caches
+from django.test import override_settings
 from django.utils.version import get_version
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -33,3 +36,26 @@ assert get_version() < '4.0.0', 'Пожалуйста, используйте в
 pytest_plugins = [
     'tests.fixtures.fixture_user',
 ]
+
+
+@pytest.fixture(autouse=True, scope='session')
+def local_caches():
+    # В тестах нет memcached, счетчики лимитов хранятся в памяти.
+    caches_settings = override_settings(CACHES={
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        },
+        'throttle': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'throttle',
+        },
+    })
+    caches_settings.enable()
+    yield
+    caches_settings.disable()
+
+
+@pytest.fixture(autouse=True)
+def clear_cache(local_caches):
+    for cache in caches.all():
+        cache.clear()
@@ -1,13 +1,22 @@
+import threading
 from http import HTTPStatus
+from smtplib import SMTPException
+from unittest import mock
 
 import pytest
 from django.core import mail
+from django.core.management import call_command
+from django.db import connection
 from django.db.utils import IntegrityError
+from django.test import Client, override_settings
 
 from tests.utils import (
     invalid_data_for_user_patch_and_creation,
     invalid_data_for_username_and_email_fields
 )
+from users.models import OutgoingEmail
+
+THREADS = 8
 
 
 @pytest.mark.django_db(transaction=True)
@@ -112,6 +121,7 @@ class Test00UserRegistration:
         }
 
         response = client.post(self.URL_SIGNUP, data=valid_data)
+        call_command('send_outbox')
         outbox_after = mail.outbox  # email outbox after user create
 
         assert response.status_code != HTTPStatus.NOT_FOUND, (
@@ -161,6 +171,7 @@ class Test00UserRegistration:
         response = admin_client.post(
             self.URL_ADMIN_CREATE_USER, data=valid_data
         )
+        call_command('send_outbox')
         outbox_after = mail.outbox
 
         assert response.status_code != HTTPStatus.NOT_FOUND, (
@@ -375,3 +386,141 @@ class Test00UserRegistration:
             'пользователя, созданного администратором,  возвращает ответ '
             'со статусом 200.'
         )
+
+    def test_signup_email_sent_from_outbox(self, client):
+        valid_data = {
+            'email': 'outbox@yamdb.fake',
+            'username': 'outbox_user'
+        }
+        outbox_before_count = len(mail.outbox)
+        with mock.patch(
+            'django.core.mail.backends.locmem.EmailBackend.send_messages',
+            side_effect=SMTPException('relay unavailable')
+        ):
+            response = client.post(self.URL_SIGNUP, data=valid_data)
+            assert response.status_code == HTTPStatus.OK, (
+                f'Проверьте, что POST-запрос к `{self.URL_SIGNUP}` не '
+                'зависит от доступности почтового сервера.'
+            )
+            call_command('send_outbox')
+        email = OutgoingEmail.objects.get(recipient=valid_data['email'])
+        assert email.sent is None and email.attempts == 1, (
+            'Проверьте, что письмо, которое не удалось отправить, '
+            'остается в очереди для повторной попытки.'
+        )
+
+        OutgoingEmail.objects.filter(pk=email.pk).update(
+            next_attempt=email.created
+        )
+        call_command('send_outbox')
+        call_command('send_outbox')
+        assert len(mail.outbox) == outbox_before_count + 1, (
+            'Проверьте, что письмо из очереди отправляется повторно '
+            'и только один раз.'
+        )
+        assert valid_data['email'] in mail.outbox[-1].to
+
+    def test_concurrent_signups_resolve_deterministically(
+            self, django_user_model
+    ):
+        same_data = {
+            'email': 'parallel@yamdb.fake',
+            'username': 'parallel_user'
+        }
+        conflicting_data = [
+            {'email': f'parallel_{idx}@yamdb.fake', 'username': 'contested'}
+            for idx in range(THREADS)
+        ]
+        results = {'same': [], 'conflicting': []}
+        barrier = threading.Barrier(THREADS * 2)
+
+        def signup(kind, data):
+            barrier.wait()
+            response = Client().post(self.URL_SIGNUP, data=data)
+            results[kind].append(response.status_code)
+            connection.close()
+
+        threads = [
+            threading.Thread(target=signup, args=('same', same_data))
+            for _ in range(THREADS)
+        ] + [
+            threading.Thread(target=signup, args=('conflicting', data))
+            for data in conflicting_data
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert results['same'] == [HTTPStatus.OK] * THREADS, (
+            f'Проверьте, что одновременные POST-запросы к `{self.URL_SIGNUP}` '
+            'с одинаковыми данными все возвращают ответ со статусом 200.'
+        )
+        assert django_user_model.objects.filter(
+            username=same_data['username']
+        ).count() == 1
+        assert sorted(results['conflicting']) == (
+            [HTTPStatus.OK] + [HTTPStatus.BAD_REQUEST] * (THREADS - 1)
+        ), (
+            f'Проверьте, что из одновременных POST-запросов к '
+            f'`{self.URL_SIGNUP}` с одним `username` и разными `email` '
+            'успешен ровно один, а остальные возвращают ответ со статусом '
+            '400.'
+        )
+
+    @override_settings(THROTTLE_RATES={
+        'signup_ip': '4/min',
+        'signup_username': '2/min',
+        'token_username': '2/min',
+    })
+    def test_signup_and_token_throttled(self, client):
+        data = {'email': 'throttled@yamdb.fake', 'username': 'throttled'}
+        statuses = [
+            client.post(self.URL_SIGNUP, data=data).status_code
+            for _ in range(3)
+        ]
+        assert statuses == [
+            HTTPStatus.OK, HTTPStatus.OK, HTTPStatus.TOO_MANY_REQUESTS
+        ], (
+            f'Проверьте, что число POST-запросов к `{self.URL_SIGNUP}` '
+            'для одного `username` ограничено.'
+        )
+        statuses = [
+            client.post(self.URL_SIGNUP, data={
+                'email': f'throttled_{idx}@yamdb.fake',
+                'username': f'throttled_{idx}'
+            }).status_code
+            for idx in range(2)
+        ]
+        assert statuses[-1] == HTTPStatus.TOO_MANY_REQUESTS, (
+            f'Проверьте, что число POST-запросов к `{self.URL_SIGNUP}` '
+            'с одного IP-адреса ограничено.'
+        )
+
+        token_data = {'username': 'throttled', 'confirmation_code': '123'}
+        statuses = [
+            client.post(self.URL_TOKEN, data=token_data).status_code
+            for _ in range(3)
+        ]
+        assert statuses[-1] == HTTPStatus.TOO_MANY_REQUESTS, (
+            f'Проверьте, что число POST-запросов к `{self.URL_TOKEN}` '
+            'для одного `username` ограничено.'
+        )
+
+    @override_settings(THROTTLE_RATES={'signup_ip': '2/min'})
+    def test_signup_throttle_ignores_forwarded_for(self, client):
+        statuses = [
+            client.post(
+                self.URL_SIGNUP,
+                data={
+                    'email': f'spoofed_{idx}@yamdb.fake',
+                    'username': f'spoofed_{idx}'
+                },
+                HTTP_X_FORWARDED_FOR=f'10.0.0.{idx}'
+            ).status_code
+            for idx in range(3)
+        ]
+        assert statuses[-1] == HTTPStatus.TOO_MANY_REQUESTS, (
+            f'Проверьте, что лимит POST-запросов к `{self.URL_SIGNUP}` '
+            'с одного IP-адреса нельзя обойти заголовком X-Forwarded-For.'
+        )
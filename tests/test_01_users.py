@@ -1,6 +1,11 @@
 from http import HTTPStatus
 
 import pytest
+from django.contrib.auth.tokens import default_token_generator
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
 
 from tests.utils import (
     check_pagination, invalid_data_for_user_patch_and_creation
@@ -564,3 +569,44 @@ class Test01UserAPI:
             f'Проверьте, что PATCH-запрос к `{self.USERS_ME_URL}` с ключом '
             '`role` не изменяет роль пользователя.'
         )
+
+    def test_11_token_claims_skip_user_query(self, client, user, admin_client):
+        response = client.post('/api/v1/auth/token/', data={
+            'username': user.username,
+            'confirmation_code': default_token_generator.make_token(user),
+        })
+        token_client = APIClient()
+        token_client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {response.json()["token"]}'
+        )
+
+        def user_queries():
+            with CaptureQueriesContext(connection) as context:
+                response = token_client.get('/api/v1/titles/1/reviews/')
+            return response, [
+                query for query in context.captured_queries
+                if 'users_users' in query['sql']
+            ]
+
+        with override_settings(JWT_CLAIMS_REVALIDATE_INTERVAL=None):
+            _, queries = user_queries()
+        assert not queries, (
+            'Проверьте, что запрос с токеном, полученным на '
+            '`/api/v1/auth/token/`, не загружает пользователя из базы.'
+        )
+        user_queries()
+        _, queries = user_queries()
+        assert not queries, (
+            'Проверьте, что сверка данных токена с базой кэшируется.'
+        )
+
+        admin_client.patch(
+            f'{self.USERS_URL}{user.username}/', data={'role': 'admin'}
+        )
+        response = token_client.post(
+            '/api/v1/categories/', data={'name': 'Кино', 'slug': 'movies'}
+        )
+        assert response.status_code == HTTPStatus.CREATED, (
+            'Проверьте, что смена роли пользователя действует сразу, '
+            'без получения нового токена.'
+        )
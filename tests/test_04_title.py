@@ -353,3 +353,83 @@ class Test04TitleAPI:
             f'Проверьте, что PUT-запрос к `{self.TITLES_DETAIL_URL_TEMPLATE} '
             'не предусмотрен и возвращает статус 405.'
         )
+
+    def create_title(self, admin_client, genres, categories, name,
+                     description):
+        response = admin_client.post(self.TITLES_URL, data={
+            'name': name,
+            'year': 2000,
+            'genre': [genres[0]['slug']],
+            'category': categories[0]['slug'],
+            'description': description,
+        })
+        assert response.status_code == HTTPStatus.CREATED
+        return response.json()['id']
+
+    def search(self, client, value):
+        response = client.get(self.TITLES_URL, data={'search': value})
+        assert response.status_code == HTTPStatus.OK
+        return [title['id'] for title in response.json()['results']]
+
+    def test_07_titles_search(self, admin_client, client):
+        genres = create_genre(admin_client)
+        categories = create_categories(admin_client)
+        weak = self.create_title(
+            admin_client, genres, categories, 'Пески времени',
+            'Долгая история о пустыне, караванах, городах и одной дюне'
+        )
+        strong = self.create_title(
+            admin_client, genres, categories, 'Дюна', 'Дюна, дюна, дюна'
+        )
+        self.create_title(
+            admin_client, genres, categories, 'Солярис', 'Океан'
+        )
+        assert self.search(client, 'дюн') == [strong, weak], (
+            f'Проверьте, что `{self.TITLES_URL}?search=` находит '
+            'произведения по началу слова и сортирует их по релевантности.'
+        )
+
+        admin_client.patch(
+            self.TITLES_DETAIL_URL_TEMPLATE.format(title_id=weak),
+            data={'name': 'Океан песка', 'description': 'Без барханов'}
+        )
+        assert self.search(client, 'дюн') == [strong], (
+            'Проверьте, что поиск учитывает изменение названия и описания '
+            'произведения.'
+        )
+        assert sorted(self.search(client, 'океан')) == sorted(
+            [weak, strong + 1]
+        )
+        admin_client.delete(
+            self.TITLES_DETAIL_URL_TEMPLATE.format(title_id=strong)
+        )
+        assert self.search(client, 'дюн') == []
+
+        for value in ('!!!', '"', '*', '- -'):
+            assert self.search(client, value) == [], (
+                f'Проверьте, что `{self.TITLES_URL}?search=` с одними '
+                'знаками препинания возвращает пустой список, а не ошибку.'
+            )
+
+    def test_08_titles_facets_search(self, admin_client, client):
+        genres = create_genre(admin_client)
+        categories = create_categories(admin_client)
+        self.create_title(
+            admin_client, genres, categories, 'Дюна', 'Пустыня'
+        )
+        self.create_title(
+            admin_client, genres, categories, 'Солярис', 'Океан'
+        )
+        response = client.get(f'{self.TITLES_URL}facets/?search=дюн')
+        assert response.status_code == HTTPStatus.OK, (
+            f'Проверьте, что GET-запрос к `{self.TITLES_URL}facets/` '
+            'с параметром `search` возвращает ответ со статусом 200.'
+        )
+        assert response.json() == {
+            'genre': [{'slug': genres[0]['slug'], 'count': 1}],
+            'category': [{'slug': categories[0]['slug'], 'count': 1}],
+            'year': [{'year': 2000, 'count': 1}],
+        }, (
+            f'Проверьте, что `{self.TITLES_URL}facets/?search=` считает '
+            'только найденные произведения.'
+        )
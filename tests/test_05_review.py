@@ -1,8 +1,11 @@
 from http import HTTPStatus
 
 import pytest
+from django.db import connection
 from django.db.utils import IntegrityError
+from django.test.utils import CaptureQueriesContext
 
+from reviews.models import Review, Title
 from tests.utils import (
     check_fields, check_pagination, create_reviews, create_single_review,
     create_titles
@@ -413,3 +416,110 @@ class Test05ReviewAPI:
             f'Проверьте, что PUT-запрос к `{self.REVIEW_DETAIL_URL_TEMPLATE} '
             'не предусмотрен и возвращает статус 405.'
         )
+
+    def test_07_review_patch_authorization_queries(self, admin_client,
+                                                   user_client):
+        titles, _, _ = create_titles(admin_client)
+        review = create_single_review(
+            user_client, titles[0]['id'], 'Отзыв', 5
+        ).json()
+        url = self.REVIEW_DETAIL_URL_TEMPLATE.format(
+            title_id=titles[0]['id'], review_id=review['id']
+        )
+        with CaptureQueriesContext(connection) as context:
+            response = user_client.patch(url, data={'text': 'Новый текст'})
+        assert response.status_code == HTTPStatus.OK
+        reads = []
+        for query in context.captured_queries:
+            if not query['sql'].startswith('SELECT'):
+                break
+            reads.append(query['sql'])
+        assert len(reads) == 1, (
+            f'Проверьте, что PATCH-запрос автора к `{url}` до изменения '
+            'отзыва выполняет один запрос к базе данных: права проверяются '
+            'по данным токена и `author_id`.'
+        )
+
+    def test_08_review_stale_instances(self, admin_client, user_client):
+        titles, _, _ = create_titles(admin_client)
+        review_id = create_single_review(
+            user_client, titles[0]['id'], 'Отзыв', 5
+        ).json()['id']
+
+        def rating():
+            return Title.objects.values_list(
+                'rating_sum', 'rating_count'
+            ).get(pk=titles[0]['id'])
+
+        first, second = Review.objects.get(pk=review_id), Review.objects.get(
+            pk=review_id
+        )
+        first.score = 7
+        first.save()
+        second.score = 3
+        second.save()
+        assert rating() == (3, 1), (
+            'Проверьте, что при изменении оценки из устаревшего объекта '
+            'отзыва из рейтинга вычитается текущая оценка, а не загруженная.'
+        )
+
+        text_only = Review.objects.get(pk=review_id)
+        rescored = Review.objects.get(pk=review_id)
+        rescored.score = 9
+        rescored.save()
+        text_only.text = 'Новый текст'
+        text_only.save()
+        assert Review.objects.get(pk=review_id).score == 9, (
+            'Проверьте, что изменение текста отзыва не затирает '
+            'параллельно измененную оценку.'
+        )
+        assert rating() == (9, 1)
+
+        first, second = Review.objects.get(pk=review_id), Review.objects.get(
+            pk=review_id
+        )
+        first.delete()
+        second.delete()
+        assert rating() == (0, 0), (
+            'Проверьте, что повторное удаление уже удаленного отзыва '
+            'не вычитает его оценку из рейтинга второй раз.'
+        )
+
+    def test_09_title_histogram(self, admin_client, user_client):
+        titles, _, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+        url = self.TITLE_DETAIL_URL_TEMPLATE.format(
+            title_id=title_id
+        ) + 'histogram/'
+
+        def histogram(**counts):
+            expected = {str(score): 0 for score in range(1, 11)}
+            expected.update(counts)
+            response = admin_client.get(url)
+            assert response.status_code == HTTPStatus.OK
+            assert response.json() == {
+                'id': title_id, 'histogram': expected
+            }, (
+                f'Проверьте, что GET-запрос к `{url}` возвращает число '
+                'оценок произведения по каждому баллу.'
+            )
+
+        histogram()
+        admin_review = create_single_review(
+            admin_client, title_id, 'Отзыв', 8
+        ).json()
+        user_review = create_single_review(
+            user_client, title_id, 'Отзыв', 8
+        ).json()
+        histogram(**{'8': 2})
+        user_client.patch(
+            self.REVIEW_DETAIL_URL_TEMPLATE.format(
+                title_id=title_id, review_id=user_review['id']
+            ),
+            data={'score': 3}
+        )
+        histogram(**{'3': 1, '8': 1})
+        admin_client.delete(self.REVIEW_DETAIL_URL_TEMPLATE.format(
+            title_id=title_id, review_id=admin_review['id']
+        ))
+        histogram(**{'3': 1})
@@ -366,3 +366,35 @@ class Test06CommentAPI:
             f'Проверьте, что PUT-запрос к `{self.COMMENT_DETAIL_URL_TEMPLATE} '
             'не предусмотрен и возвращает статус 405.'
         )
+
+    def test_08_comment_author_rename(self, admin_client, admin, user_client,
+                                      user, moderator_client, moderator):
+        author_map = {
+            admin: admin_client,
+            user: user_client,
+            moderator: moderator_client
+        }
+        _, reviews, titles = create_comments(admin_client, author_map)
+        urls = (
+            f'/api/v1/titles/{titles[0]["id"]}/reviews/',
+            self.COMMENTS_URL_TEMPLATE.format(
+                title_id=titles[0]['id'], review_id=reviews[0]['id']
+            ),
+        )
+        for url in urls:
+            assert user.username in {
+                obj['author'] for obj in admin_client.get(url).json()['results']
+            }
+
+        response = user_client.patch(
+            '/api/v1/users/me/', data={'username': 'RenamedUser'}
+        )
+        assert response.status_code == HTTPStatus.OK
+        for url in urls:
+            authors = {
+                obj['author'] for obj in admin_client.get(url).json()['results']
+            }
+            assert 'RenamedUser' in authors and user.username not in authors, (
+                f'Проверьте, что после смены username GET-запрос к `{url}` '
+                'возвращает отзывы и комментарии с новым именем автора.'
+            )
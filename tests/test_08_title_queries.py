@@ -0,0 +1,234 @@
+from base64 import b64decode
+from http import HTTPStatus
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+
+from api.reviews.catalog import catalog
+from tests.utils import create_categories, create_genre, create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test08TitleQueries:
+
+    TITLES_URL = '/api/v1/titles/'
+    TITLES_DETAIL_URL_TEMPLATE = '/api/v1/titles/{title_id}/'
+
+    def create_titles(self, admin_client, count, genres, categories):
+        title_ids = []
+        for idx in range(count):
+            response = admin_client.post(self.TITLES_URL, data={
+                'name': f'Произведение {idx}',
+                'year': 1990 + idx,
+                'genre': [genre['slug'] for genre in genres],
+                'category': categories[idx % len(categories)]['slug'],
+                'description': 'Описание'
+            })
+            title_ids.append(response.json()['id'])
+        return title_ids
+
+    def count_queries(self, client, url):
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(url)
+        return response, len(context.captured_queries)
+
+    def test_01_titles_list_queries_do_not_grow(self, admin_client, client):
+        genres = create_genre(admin_client)
+        categories = create_categories(admin_client)
+        self.create_titles(admin_client, 1, genres, categories)
+        response, single_title_queries = self.count_queries(
+            client, self.TITLES_URL
+        )
+        assert len(response.json()['results']) == 1
+
+        self.create_titles(admin_client, 4, genres, categories)
+        response, full_page_queries = self.count_queries(
+            client, self.TITLES_URL
+        )
+        assert len(response.json()['results']) == 5
+        assert full_page_queries == single_title_queries, (
+            'Проверьте, что количество запросов к базе данных при '
+            f'GET-запросе к `{self.TITLES_URL}` не зависит от числа '
+            'произведений на странице: жанры и категории нужно загружать '
+            'вместе с произведениями.'
+        )
+
+    def test_02_title_detail_queries(self, admin_client, client):
+        genres = create_genre(admin_client)
+        categories = create_categories(admin_client)
+        title_id = self.create_titles(admin_client, 1, genres, categories)[0]
+        url = self.TITLES_DETAIL_URL_TEMPLATE.format(title_id=title_id)
+        response, queries = self.count_queries(client, url)
+        assert response.json()['id'] == title_id
+        assert queries <= 2, (
+            f'Проверьте, что GET-запрос к `{self.TITLES_DETAIL_URL_TEMPLATE}` '
+            'загружает произведение вместе с категорией и жанрами не более '
+            'чем за два запроса к базе данных.'
+        )
+
+    def test_03_titles_list_uses_fragment_cache(self, admin_client, client):
+        genres = create_genre(admin_client)
+        categories = create_categories(admin_client)
+        title_id = self.create_titles(admin_client, 3, genres, categories)[0]
+        first, _ = self.count_queries(client, self.TITLES_URL)
+        with CaptureQueriesContext(connection) as context:
+            second = client.get(self.TITLES_URL)
+        genre_queries = [
+            query for query in context.captured_queries
+            if 'reviews_genre' in query['sql']
+        ]
+        assert second.json() == first.json()
+        assert not genre_queries, (
+            f'Проверьте, что повторный GET-запрос к `{self.TITLES_URL}` '
+            'берет представления произведений из кэша и не загружает жанры.'
+        )
+
+        response = admin_client.patch(
+            self.TITLES_DETAIL_URL_TEMPLATE.format(title_id=title_id),
+            data={'genre': [genres[0]['slug']]}, format='json'
+        )
+        assert response.status_code == 200
+        titles = {
+            title['id']: title
+            for title in client.get(self.TITLES_URL).json()['results']
+        }
+        assert [
+            genre['slug'] for genre in titles[title_id]['genre']
+        ] == [genres[0]['slug']], (
+            'Проверьте, что после изменения жанров произведения '
+            f'GET-запрос к `{self.TITLES_URL}` возвращает новые жанры.'
+        )
+
+    def test_04_titles_list_from_catalog_snapshot(self, admin_client, client):
+        genres = create_genre(admin_client)
+        categories = create_categories(admin_client)
+        self.create_titles(admin_client, 4, genres[:1], categories)
+        self.create_titles(admin_client, 3, genres[1:], categories)
+        catalog.stamps = None
+        urls = [
+            self.TITLES_URL,
+            f'{self.TITLES_URL}?genre={genres[1]["slug"]}&ordering=-year',
+            f'{self.TITLES_URL}?category={categories[0]["slug"]}&page=2',
+            f'{self.TITLES_URL}?name=2&year=1992',
+        ]
+        expected = [client.get(url).json() for url in urls]
+        with override_settings(CATALOG_SNAPSHOT=True):
+            assert [client.get(url).json() for url in urls] == expected, (
+                'Проверьте, что список произведений по снимку каталога '
+                'совпадает со списком из базы данных.'
+            )
+            queries = sum(
+                self.count_queries(client, url)[1] for url in urls
+            )
+        assert queries == 0, (
+            'Проверьте, что повторные GET-запросы к списку произведений '
+            'при включенном снимке каталога не обращаются к базе данных.'
+        )
+
+    def walk_cursor(self, client, url, link):
+        ids = []
+        while url:
+            response = client.get(url)
+            assert response.status_code == 200
+            data = response.json()
+            ids.extend(title['id'] for title in data['results'])
+            url = data[link]
+            if url:
+                cursor = parse_qs(urlparse(url).query)['cursor'][0]
+                assert 'o=' not in b64decode(cursor).decode(), (
+                    'Проверьте, что курсор произведений хранит составную '
+                    'позицию и не переходит к смещению OFFSET при '
+                    'одинаковых значениях поля сортировки.'
+                )
+        return ids
+
+    def test_05_titles_cursor_with_ties(self, admin_client, client):
+        genres = create_genre(admin_client)
+        categories = create_categories(admin_client)
+        title_ids = self.create_titles(admin_client, 12, genres, categories)
+        for ordering, expected in (
+            ('rating', sorted(title_ids)),
+            ('-rating', sorted(title_ids, reverse=True)),
+        ):
+            url = f'{self.TITLES_URL}?ordering={ordering}&cursor='
+            forward = self.walk_cursor(client, url, 'next')
+            assert forward == expected, (
+                'Проверьте, что курсорная пагинация со сортировкой '
+                f'`ordering={ordering}` проходит все произведения с '
+                'одинаковым рейтингом без пропусков и повторов.'
+            )
+            last_page = client.get(url)
+            while last_page.json()['next']:
+                last_page = client.get(last_page.json()['next'])
+            backward = self.walk_cursor(
+                client, last_page.json()['previous'], 'previous'
+            )
+            assert sorted(backward) == sorted(expected[:10]), (
+                'Проверьте, что ссылки previous курсорной пагинации '
+                'возвращают предыдущие страницы произведений.'
+            )
+
+    def facets(self, client, query=''):
+        response = client.get(f'{self.TITLES_URL}facets/{query}')
+        assert response.status_code == HTTPStatus.OK, (
+            f'Проверьте, что GET-запрос к `{self.TITLES_URL}facets/{query}` '
+            'возвращает ответ со статусом 200.'
+        )
+        data = response.json()
+        return (
+            {item['slug']: item['count'] for item in data['genre']},
+            {item['slug']: item['count'] for item in data['category']},
+            {item['year']: item['count'] for item in data['year']},
+        )
+
+    def test_06_titles_facets(self, admin_client, client):
+        create_titles(admin_client)
+        response = admin_client.post(self.TITLES_URL, data={
+            'name': 'Чужой',
+            'year': 1984,
+            'genre': ['horror'],
+            'category': 'books',
+            'description': 'Космос'
+        })
+        assert response.status_code == HTTPStatus.CREATED
+        cases = {
+            '': (
+                {'comedy': 1, 'drama': 1, 'horror': 2},
+                {'books': 2, 'films': 1},
+                {1984: 2, 1988: 1},
+            ),
+            '?genre=horror': (
+                {'comedy': 1, 'horror': 2},
+                {'books': 1, 'films': 1},
+                {1984: 2},
+            ),
+            '?category=books': (
+                {'drama': 1, 'horror': 1},
+                {'books': 2},
+                {1984: 1, 1988: 1},
+            ),
+            '?year=1988': (
+                {'drama': 1},
+                {'books': 1},
+                {1988: 1},
+            ),
+            '?search=космос': (
+                {'horror': 1},
+                {'books': 1},
+                {1984: 1},
+            ),
+            '?genre=horror&category=films&year=1984': (
+                {'comedy': 1, 'horror': 1},
+                {'films': 1},
+                {1984: 1},
+            ),
+        }
+        for query, expected in cases.items():
+            assert self.facets(client, query) == expected, (
+                f'Проверьте, что `{self.TITLES_URL}facets/{query}` считает '
+                'жанры, категории и годы только по произведениям, '
+                'подходящим под фильтры.'
+            )
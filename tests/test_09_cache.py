@@ -0,0 +1,296 @@
+import logging
+import threading
+import time
+from http import HTTPStatus
+from io import StringIO
+
+import pytest
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.http import HttpResponse
+from django.db import connection
+from django.test import Client, RequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from api import middleware
+from api.caching import get_or_compute
+from reviews.models import Genre
+from tests.utils import create_single_review, create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test09Cache:
+
+    def test_01_get_or_compute_single_flight(self):
+        calls = []
+        results = []
+
+        def compute():
+            calls.append(1)
+            time.sleep(0.2)
+            return 'значение'
+
+        def worker():
+            results.append(get_or_compute('test:key', compute, 60))
+
+        threads = [threading.Thread(target=worker) for _ in range(10)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert len(calls) == 1, (
+            'Проверьте, что при одновременных запросах значение кэша '
+            'пересчитывает только один из них.'
+        )
+        assert results == ['значение'] * 10, (
+            'Проверьте, что остальные запросы дожидаются пересчитанного '
+            'значения.'
+        )
+
+    def test_02_get_or_compute_serves_stale_value(self):
+        get_or_compute('test:key', lambda: 'старое', 0)
+        cache.add('lock:test:key', True)
+        assert get_or_compute('test:key', lambda: 'новое', 60) == 'старое', (
+            'Проверьте, что пока значение пересчитывается другим запросом, '
+            'возвращается устаревшее значение.'
+        )
+        cache.delete('lock:test:key')
+        assert get_or_compute('test:key', lambda: 'новое', 60) == 'новое'
+
+    @override_settings(CACHE_LOCK_WAIT=0.1)
+    def test_03_get_or_compute_wait_timeout(self):
+        cache.add('lock:test:key', 'чужая')
+        assert get_or_compute('test:key', lambda: 'значение', 60) == (
+            'значение'
+        ), (
+            'Проверьте, что не дождавшийся пересчета запрос вычисляет '
+            'значение сам.'
+        )
+        assert cache.get('lock:test:key') == 'чужая', (
+            'Проверьте, что запрос, не захвативший блокировку пересчета, '
+            'не снимает ее.'
+        )
+
+    def test_04_warm_cache_command(self, admin_client):
+        _, categories, genres = create_titles(admin_client)
+        out = StringIO()
+        call_command('warm_cache', concurrency=1, verbosity=2, stdout=out)
+        output = out.getvalue()
+        assert f'/api/v1/titles/?genre={genres[0]["slug"]}' in output
+        assert f'/api/v1/categories/{categories[0]["slug"]}/top/' in output
+        assert 'Прогрето страниц' in output, (
+            'Проверьте, что команда warm_cache сообщает итоговое время '
+            'прогрева.'
+        )
+
+    def test_05_warm_cache_command_host(self, admin_client):
+        create_titles(admin_client)
+        err = StringIO()
+        call_command(
+            'warm_cache', concurrency=1, host='yamdb.example',
+            stdout=StringIO(), stderr=err
+        )
+        assert err.getvalue() == '', (
+            'Проверьте, что команда warm_cache запрашивает следующие '
+            'страницы списков, только пока они есть.'
+        )
+        client = Client(HTTP_HOST='yamdb.example')
+        with CaptureQueriesContext(connection) as context:
+            response = client.get('/api/v1/categories/')
+        assert response.status_code == 200
+        assert not context.captured_queries, (
+            'Проверьте, что команда warm_cache с параметром --host '
+            'заполняет кэш ответов для запросов с этим заголовком Host.'
+        )
+
+    def test_06_cache_control_headers(self, client, user_client):
+        response = client.get('/api/v1/categories/')
+        cache_control = response.get('Cache-Control', '')
+        assert 'public' in cache_control and 'max-age' in cache_control, (
+            'Проверьте, что ответ на анонимный GET-запрос к '
+            '`/api/v1/categories/` разрешает публичное кэширование.'
+        )
+        vary = response.get('Vary', '')
+        assert 'Authorization' in vary and 'Accept' in vary, (
+            'Проверьте, что публично кэшируемый ответ различается по '
+            'заголовкам Authorization и Accept.'
+        )
+
+        for url in ('/api/v1/categories/', '/api/v1/users/me/'):
+            response = user_client.get(url)
+            assert 'no-store' in response.get('Cache-Control', ''), (
+                f'Проверьте, что ответ на GET-запрос к `{url}` с токеном '
+                'запрещает кэширование.'
+            )
+
+    @override_settings(REQUEST_COALESCING=True)
+    def test_07_request_coalescing(self):
+        calls = []
+        responses = []
+
+        def get_response(request):
+            calls.append(request.path)
+            time.sleep(0.2)
+            return HttpResponse('{"id": 1}', content_type='application/json')
+
+        coalescing = middleware.RequestCoalescingMiddleware(get_response)
+        before = middleware.stats.snapshot()
+
+        def worker():
+            request = RequestFactory().get('/api/v1/titles/1/')
+            responses.append(coalescing(request))
+
+        threads = [threading.Thread(target=worker) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert len(calls) == 1, (
+            'Проверьте, что одновременные одинаковые GET-запросы '
+            'обрабатываются один раз.'
+        )
+        assert all(r.content == b'{"id": 1}' for r in responses)
+        after = middleware.stats.snapshot()
+        assert after['requests'] - before['requests'] == 5
+        assert after['coalesced'] - before['coalesced'] == 4
+
+    def test_08_request_key_includes_host_and_scheme(self):
+        factory = RequestFactory()
+        keys = {
+            middleware.request_key(factory.get('/api/v1/titles/')),
+            middleware.request_key(
+                factory.get('/api/v1/titles/', HTTP_HOST='yamdb.example')
+            ),
+            middleware.request_key(
+                factory.get('/api/v1/titles/', secure=True)
+            ),
+        }
+        assert len(keys) == 3, (
+            'Проверьте, что запросы к одному пути на разные хосты или по '
+            'разным схемам не объединяются: ссылки пагинации в ответах '
+            'различаются.'
+        )
+
+    @override_settings(REQUEST_COALESCING_LOG_INTERVAL=3)
+    def test_09_request_coalescing_stats_logged(self, caplog):
+        stats = middleware.CoalescingStats()
+        with caplog.at_level(logging.INFO, logger='api.middleware'):
+            for coalesced in (True, False, True, False):
+                stats.record(coalesced)
+        messages = [record.getMessage() for record in caplog.records]
+        assert len(messages) == 1 and 'запросов 3' in messages[0] and (
+            'объединено 2' in messages[0]
+        ), (
+            'Проверьте, что счетчики объединения запросов пишутся в лог '
+            'каждые REQUEST_COALESCING_LOG_INTERVAL запросов.'
+        )
+
+    def test_10_admin_changes_invalidate_lists(self, admin_client, client,
+                                               user_superuser):
+        titles, _, _ = create_titles(admin_client)
+        categories = client.get('/api/v1/categories/').json()
+        titles_count = client.get('/api/v1/titles/').json()['count']
+
+        site_admin = Client()
+        site_admin.force_login(user_superuser)
+        response = site_admin.post(
+            '/admin/reviews/category/add/',
+            data={'name': 'Сериал', 'slug': 'series'}
+        )
+        assert response.status_code == HTTPStatus.FOUND
+        response = site_admin.post(
+            f'/admin/reviews/title/{titles[0]["id"]}/delete/',
+            data={'post': 'yes'}
+        )
+        assert response.status_code == HTTPStatus.FOUND
+
+        data = client.get('/api/v1/categories/').json()
+        assert data['count'] == categories['count'] + 1 and 'series' in {
+            category['slug'] for category in data['results']
+        }, (
+            'Проверьте, что после добавления категории через админку '
+            'GET-запрос к `/api/v1/categories/` возвращает ее и новое '
+            'количество категорий.'
+        )
+        assert client.get('/api/v1/titles/').json()['count'] == (
+            titles_count - 1
+        ), (
+            'Проверьте, что после удаления произведения через админку '
+            'GET-запрос к `/api/v1/titles/` возвращает новое количество '
+            'произведений.'
+        )
+
+    def test_11_slug_resolver_invalidation(self, admin_client):
+        _, categories, genres = create_titles(admin_client)
+        data = {
+            'name': 'Чужой',
+            'year': 1979,
+            'genre': [genres[0]['slug']],
+            'category': categories[0]['slug'],
+            'description': 'Описание',
+        }
+        response = admin_client.post('/api/v1/titles/', data=data)
+        assert response.status_code == HTTPStatus.CREATED
+
+        genre = Genre.objects.get(slug=genres[0]['slug'])
+        genre.slug = 'renamed'
+        genre.save()
+        response = admin_client.post('/api/v1/titles/', data=data)
+        assert response.status_code == HTTPStatus.BAD_REQUEST, (
+            'Проверьте, что после смены slug жанра старый slug больше '
+            'не принимается при создании произведения.'
+        )
+        response = admin_client.post(
+            '/api/v1/titles/', data={**data, 'genre': ['renamed']}
+        )
+        assert response.status_code == HTTPStatus.CREATED
+        assert response.json()['genre'] == ['renamed']
+
+    @pytest.mark.parametrize('snapshot', (False, True))
+    def test_12_memcached_unavailable(self, admin_client, client, snapshot):
+        titles, _, genres = create_titles(admin_client)
+        title_id = titles[0]['id']
+        # На этом адресе memcached не запущен.
+        memcached = {
+            'BACKEND': 'django.core.cache.backends.memcached.PyMemcacheCache',
+            'LOCATION': '127.0.0.1:1',
+            'OPTIONS': settings.MEMCACHED_OPTIONS,
+        }
+        urls = (
+            '/api/v1/titles/',
+            f'/api/v1/titles/?genre={genres[0]["slug"]}',
+            f'/api/v1/titles/{title_id}/',
+            f'/api/v1/titles/{title_id}/reviews/',
+            '/api/v1/genres/',
+        )
+        with override_settings(
+            CACHES={'default': memcached, 'throttle': memcached},
+            CATALOG_SNAPSHOT=snapshot,
+        ):
+            started = time.monotonic()
+            for url in urls:
+                response = client.get(url)
+                assert response.status_code == HTTPStatus.OK, (
+                    f'Проверьте, что без memcached GET-запрос к `{url}` '
+                    'возвращает ответ со статусом 200.'
+                )
+            create_single_review(admin_client, title_id, 'Отзыв', 7)
+            responses = [client.get(url).json() for url in urls[:4]]
+            ratings = [
+                next(
+                    title['rating'] for title in responses[0]['results']
+                    if title['id'] == title_id
+                ),
+                responses[1]['results'][0]['rating'],
+                responses[2]['rating'],
+                responses[3]['results'][0]['score'],
+            ]
+            assert ratings == [7] * 4, (
+                'Проверьте, что без memcached ответы на GET-запросы не '
+                'берутся из устаревшего кэша.'
+            )
+            assert time.monotonic() - started < settings.CACHE_LOCK_WAIT, (
+                'Проверьте, что без memcached запросы не ждут блокировку '
+                'пересчета кэша.'
+            )
@@ -0,0 +1,125 @@
+from unittest import mock
+
+import pytest
+
+from reviews.constants import LEADERBOARD_SIZE
+from reviews.models import Category, Genre, Leaderboard, Review, Title
+
+
+@pytest.mark.django_db(transaction=True)
+class Test10Leaderboard:
+
+    @pytest.fixture
+    def groups(self):
+        return (
+            Genre.objects.create(name='Драма', slug='drama'),
+            Category.objects.create(name='Фильм', slug='movie'),
+        )
+
+    def create_title(self, groups, name):
+        genre, category = groups
+        title = Title.objects.create(
+            name=name, year=2000, category=category, description='Описание'
+        )
+        title.genre.add(genre)
+        return title
+
+    def review(self, django_user_model, title, *scores):
+        for score in scores:
+            author = django_user_model.objects.create_user(
+                username=f'author_{django_user_model.objects.count()}',
+                email=f'author_{django_user_model.objects.count()}@yamdb.fake'
+            )
+            Review.objects.create(
+                title=title, author=author, text='Отзыв', score=score
+            )
+
+    def top(self, groups):
+        genre, category = groups
+        genre_top = list(Leaderboard.objects.filter(
+            genre=genre
+        ).values_list('title_id', flat=True))
+        category_top = list(Leaderboard.objects.filter(
+            category=category
+        ).values_list('title_id', flat=True))
+        assert genre_top == category_top
+        return genre_top
+
+    def test_01_title_enters_leaderboard(self, groups, django_user_model):
+        title = self.create_title(groups, 'Произведение')
+        assert self.top(groups) == [], (
+            'Проверьте, что произведение без оценок не попадает в топ.'
+        )
+        self.review(django_user_model, title, 8)
+        assert self.top(groups) == [title.pk], (
+            'Проверьте, что после первой оценки произведение попадает в топ '
+            'своего жанра и категории.'
+        )
+
+    def test_02_leaderboard_tie_order(self, groups, django_user_model):
+        popular = self.create_title(groups, 'Популярное')
+        first = self.create_title(groups, 'Первое')
+        second = self.create_title(groups, 'Второе')
+        best = self.create_title(groups, 'Лучшее')
+        self.review(django_user_model, second, 7)
+        self.review(django_user_model, first, 7)
+        self.review(django_user_model, popular, 7, 7)
+        self.review(django_user_model, best, 9)
+        assert self.top(groups) == [best.pk, popular.pk, first.pk, second.pk], (
+            'Проверьте, что топ упорядочен по рейтингу, затем по числу '
+            'оценок, затем по id произведения.'
+        )
+
+    def test_03_title_leaves_leaderboard(self, groups, django_user_model):
+        titles = [
+            self.create_title(groups, f'Произведение {idx}')
+            for idx in range(LEADERBOARD_SIZE)
+        ]
+        for title in titles:
+            self.review(django_user_model, title, 5)
+        newcomer = self.create_title(groups, 'Новинка')
+        self.review(django_user_model, newcomer, 9)
+        top = self.top(groups)
+        assert top[0] == newcomer.pk and titles[-1].pk not in top, (
+            'Проверьте, что произведение с более высоким рейтингом '
+            'вытесняет из заполненного топа последнее.'
+        )
+        assert len(top) == LEADERBOARD_SIZE
+
+        Review.objects.get(title=newcomer).delete()
+        assert self.top(groups) == [title.pk for title in titles], (
+            'Проверьте, что после удаления единственной оценки произведение '
+            'покидает топ, а его место занимает следующее.'
+        )
+
+        titles[0].category = Category.objects.create(
+            name='Книга', slug='book'
+        )
+        titles[0].save()
+        assert titles[0].pk not in Leaderboard.objects.filter(
+            category=groups[1]
+        ).values_list('title_id', flat=True), (
+            'Проверьте, что после смены категории произведение покидает '
+            'топ прежней категории.'
+        )
+
+    def test_04_leaderboard_refresh_on_title_delete(self, groups,
+                                                   django_user_model):
+        titles = [
+            self.create_title(groups, f'Произведение {idx}')
+            for idx in range(LEADERBOARD_SIZE + 1)
+        ]
+        for title in titles:
+            self.review(django_user_model, title, 5, 5)
+        assert titles[-1].pk not in self.top(groups)
+
+        with mock.patch.object(Title, 'update_rating') as update_rating:
+            titles[0].delete()
+        assert not update_rating.called, (
+            'Проверьте, что каскадное удаление отзывов удаляемого '
+            'произведения не пересчитывает его рейтинг и топы.'
+        )
+        assert self.top(groups) == [title.pk for title in titles[1:]], (
+            'Проверьте, что место удаленного произведения в топе занимает '
+            'следующее.'
+        )
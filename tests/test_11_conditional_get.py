@@ -0,0 +1,115 @@
+from http import HTTPStatus
+
+import pytest
+
+from reviews.models import Genre
+from tests.utils import create_comments
+
+
+@pytest.mark.django_db(transaction=True)
+class Test11ConditionalGet:
+
+    TITLE_URL_TEMPLATE = '/api/v1/titles/{title_id}/'
+    REVIEW_URL_TEMPLATE = '/api/v1/titles/{title_id}/reviews/{review_id}/'
+    COMMENTS_URL_TEMPLATE = (
+        '/api/v1/titles/{title_id}/reviews/{review_id}/comments/'
+    )
+
+    def check_etag_changed(self, client, url, change, message):
+        etag = client.get(url)['ETag']
+        change()
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK, message
+        assert response['ETag'] != etag, message
+
+    def test_01_not_modified(self, admin_client, admin, client):
+        comments, reviews, titles = create_comments(
+            admin_client, {admin: admin_client}
+        )
+        urls = (
+            self.TITLE_URL_TEMPLATE.format(title_id=titles[0]['id']),
+            self.REVIEW_URL_TEMPLATE.format(
+                title_id=titles[0]['id'], review_id=reviews[0]['id']
+            ),
+            self.COMMENTS_URL_TEMPLATE.format(
+                title_id=titles[0]['id'], review_id=reviews[0]['id']
+            ),
+        )
+        for url in urls:
+            response = client.get(url)
+            assert response.has_header('ETag'), (
+                f'Проверьте, что ответ на GET-запрос к `{url}` содержит '
+                'заголовок ETag.'
+            )
+            response = client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+            assert response.status_code == HTTPStatus.NOT_MODIFIED, (
+                f'Проверьте, что GET-запрос к `{url}` с заголовком '
+                'If-None-Match, совпадающим с ETag, возвращает ответ со '
+                'статусом 304.'
+            )
+            assert not response.content
+
+    def test_02_etag_changes(self, admin_client, admin, client):
+        comments, reviews, titles = create_comments(
+            admin_client, {admin: admin_client}
+        )
+        title_id, review_id = titles[0]['id'], reviews[0]['id']
+        review_url = self.REVIEW_URL_TEMPLATE.format(
+            title_id=title_id, review_id=review_id
+        )
+        self.check_etag_changed(
+            client, review_url,
+            lambda: admin_client.patch(review_url, data={'text': 'Новый'}),
+            'Проверьте, что после изменения отзыва меняется его ETag.'
+        )
+
+        comments_url = self.COMMENTS_URL_TEMPLATE.format(
+            title_id=title_id, review_id=review_id
+        )
+        self.check_etag_changed(
+            client, comments_url,
+            lambda: admin_client.delete(
+                f'{comments_url}{comments[0]["id"]}/'
+            ),
+            'Проверьте, что после удаления комментария меняется ETag '
+            'списка комментариев.'
+        )
+
+        def rename_genre():
+            genre = Genre.objects.get(slug=titles[0]['genre'][0])
+            genre.name = 'Новое название'
+            genre.save()
+
+        self.check_etag_changed(
+            client, self.TITLE_URL_TEMPLATE.format(title_id=title_id),
+            rename_genre,
+            'Проверьте, что после переименования жанра меняется ETag '
+            'произведения этого жанра.'
+        )
+
+    def test_03_etag_changes_after_author_rename(self, admin_client, admin,
+                                                 user_client, user, client):
+        comments, reviews, titles = create_comments(
+            admin_client, {admin: admin_client, user: user_client}
+        )
+        title_id, review_id = titles[0]['id'], reviews[1]['id']
+        urls = (
+            self.REVIEW_URL_TEMPLATE.format(
+                title_id=title_id, review_id=review_id
+            ),
+            self.COMMENTS_URL_TEMPLATE.format(
+                title_id=title_id, review_id=reviews[0]['id']
+            ) + f'{comments[1]["id"]}/',
+        )
+        etags = [client.get(url)['ETag'] for url in urls]
+        response = user_client.patch(
+            '/api/v1/users/me/', data={'username': 'RenamedUser'}
+        )
+        assert response.status_code == HTTPStatus.OK
+        for url, etag in zip(urls, etags):
+            response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+            assert response.status_code == HTTPStatus.OK, (
+                'Проверьте, что после смены username автора ETag '
+                f'ответа на GET-запрос к `{url}` меняется.'
+            )
+            assert response.json()['author'] == 'RenamedUser'
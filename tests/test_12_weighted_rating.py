@@ -0,0 +1,59 @@
+from io import StringIO
+
+import pytest
+from django.core.management import CommandError, call_command
+from django.test import override_settings
+
+from reviews.models import Title
+from tests.utils import create_single_review, create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test12WeightedRating:
+
+    def weighted_rating(self, title_id):
+        return Title.objects.get(pk=title_id).weighted_rating
+
+    def test_01_min_votes_validation(self):
+        with pytest.raises(CommandError):
+            call_command('update_weighted_ratings', min_votes=0)
+
+    @override_settings(WEIGHTED_RATING_MIN_VOTES=1)
+    def test_02_weighted_rating_kept_fresh(self, admin_client, user_client):
+        titles, _, _ = create_titles(admin_client)
+        create_single_review(admin_client, titles[0]['id'], 'Отзыв', 8)
+        call_command('update_weighted_ratings', min_votes=1, stdout=StringIO())
+        assert self.weighted_rating(titles[0]['id']) == 8
+        assert self.weighted_rating(titles[1]['id']) == 8
+
+        create_single_review(user_client, titles[1]['id'], 'Отзыв', 2)
+        assert self.weighted_rating(titles[1]['id']) == (2 + 8) / 2, (
+            'Проверьте, что новая оценка сразу меняет взвешенный рейтинг '
+            'произведения, не дожидаясь полного пересчета.'
+        )
+        response = admin_client.post('/api/v1/titles/', data={
+            'name': 'Новинка',
+            'year': 2000,
+            'genre': titles[0]['genre'],
+            'category': titles[0]['category'],
+            'description': 'Описание'
+        })
+        assert self.weighted_rating(response.json()['id']) == 8, (
+            'Проверьте, что взвешенный рейтинг нового произведения без '
+            'оценок равен средней оценке.'
+        )
+
+    def test_03_weighted_rating_keeps_job_min_votes(self, admin_client,
+                                                    user_client):
+        titles, _, _ = create_titles(admin_client)
+        create_single_review(admin_client, titles[0]['id'], 'Отзыв', 8)
+        call_command(
+            'update_weighted_ratings', min_votes=1000, stdout=StringIO()
+        )
+        create_single_review(user_client, titles[1]['id'], 'Отзыв', 2)
+        assert self.weighted_rating(titles[1]['id']) == pytest.approx(
+            (2 + 1000 * 8) / (1 + 1000)
+        ), (
+            'Проверьте, что новая оценка пересчитывает взвешенный рейтинг '
+            'с тем же весом, что и последний полный пересчет.'
+        )
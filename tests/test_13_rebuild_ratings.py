@@ -0,0 +1,75 @@
+from http import HTTPStatus
+from io import StringIO
+
+import pytest
+from django.core.management import CommandError, call_command
+
+from reviews.models import Leaderboard, Title
+from tests.utils import create_single_review, create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test13RebuildRatings:
+
+    TITLE_URL_TEMPLATE = '/api/v1/titles/{title_id}/'
+
+    def test_01_rebuild_ratings(self, admin_client, client):
+        titles, _, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+        create_single_review(admin_client, title_id, 'Отзыв', 8)
+        call_command('update_weighted_ratings', stdout=StringIO())
+        Title.objects.filter(pk=title_id).update(
+            rating_sum=2, rating=2, score_8_count=0, score_2_count=1,
+            weighted_rating=0.5
+        )
+        Leaderboard.objects.filter(title_id=title_id).delete()
+        url = self.TITLE_URL_TEMPLATE.format(title_id=title_id)
+        etag = client.get(url)['ETag']
+
+        with pytest.raises(CommandError, match=str(title_id)):
+            call_command('rebuild_ratings', check=True, stdout=StringIO())
+        assert Title.objects.get(pk=title_id).rating == 2, (
+            'Проверьте, что команда rebuild_ratings с флагом --check '
+            'ничего не изменяет.'
+        )
+
+        call_command('rebuild_ratings', stdout=StringIO())
+        title = Title.objects.get(pk=title_id)
+        assert (title.rating_sum, title.rating, title.weighted_rating) == (
+            8, 8, 8
+        ), (
+            'Проверьте, что команда rebuild_ratings восстанавливает сумму '
+            'оценок, рейтинг и взвешенный рейтинг произведения.'
+        )
+        assert Leaderboard.objects.filter(title_id=title_id).exists(), (
+            'Проверьте, что команда rebuild_ratings обновляет топы '
+            'исправленных произведений.'
+        )
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что после исправления рейтинга командой '
+            'rebuild_ratings меняется ETag произведения.'
+        )
+        assert response.json()['rating'] == 8
+
+        out = StringIO()
+        call_command('rebuild_ratings', check=True, stdout=out)
+        assert 'Рейтинги в порядке' in out.getvalue()
+
+    def test_02_rebuild_ratings_histogram(self, admin_client, user_client):
+        titles, _, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+        create_single_review(admin_client, title_id, 'Отзыв', 8)
+        create_single_review(user_client, title_id, 'Отзыв', 3)
+        url = f'{self.TITLE_URL_TEMPLATE.format(title_id=title_id)}histogram/'
+        expected = admin_client.get(url).json()
+        Title.objects.filter(pk=title_id).update(
+            score_8_count=0, score_3_count=5, score_10_count=2
+        )
+        assert admin_client.get(url).json() != expected
+
+        call_command('rebuild_ratings', stdout=StringIO())
+        assert admin_client.get(url).json() == expected, (
+            'Проверьте, что команда rebuild_ratings восстанавливает '
+            'гистограмму оценок произведения по отзывам.'
+        )